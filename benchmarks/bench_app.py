@@ -0,0 +1,123 @@
+"""Drive every page of interface.py headlessly with Streamlit's AppTest at growing data sizes.
+
+For each scale a synthetic dataset is written (see synthetic_data.py) and a
+fresh Python process runs the app against it, recording:
+  - load: the first run after login, which builds the model and caches
+  - open: switching to each page
+  - each widget interaction on the page (one rerun each)
+  - peak RSS of the process after each step (monotonic, so growth shows
+    which step allocated)
+
+Run from the repository root:
+
+    python benchmarks/bench_app.py [scales ...]      (default: 1 10 100)
+    python benchmarks/bench_app.py 1000              (minutes, several GB)
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APP = os.path.join(ROOT, 'interface.py')
+PASSWORD = 'Upside'
+TIMEOUT = 1800
+
+
+def _widget(widgets, label):
+    return next(widget for widget in widgets if widget.label == label)
+
+
+def _second(widget):
+    return widget.options[min(1, len(widget.options) - 1)]
+
+
+def _search_part(at):
+    # The first word of the second-best match, e.g. 'SANCHEZ'
+    return _widget(at.selectbox, "Matching doctors:").options[1].split(',')[0]
+
+
+# page -> [(interaction, function of the AppTest that sets a widget value)]
+PAGES = {
+    'Home': [
+        ('procedure ranking', lambda at: (lambda w: w.select(_second(w)))(
+            _widget(at.selectbox, "Select a procedure to view the ranking of doctors:"))),
+        ('specialty ranking', lambda at: (lambda w: w.select(_second(w)))(
+            _widget(at.selectbox, "Select a specialty to view the ranking of doctors:"))),
+        ('download format', lambda at: _widget(at.radio, "Download format:").set_value('csv')),
+    ],
+    'Doctor Profile Lookup': [
+        ('name search', lambda at: _widget(at.text_input, "Search for a doctor by name:").input(_search_part(at))),
+        ('pick match', lambda at: (lambda w: w.select(w.options[-1]))(_widget(at.selectbox, "Matching doctors:"))),
+    ],
+    'Insurance Payment Averages': [
+        ('procedure', lambda at: (lambda w: w.select(_second(w)))(
+            _widget(at.selectbox, "Select a procedure to view insurance payment averages:"))),
+        ('compare metric', lambda at: _widget(at.radio, "Compare:").set_value('Avg Payment')),
+        ('revenue insurance', lambda at: (lambda w: w.select(_second(w)))(_widget(at.selectbox, "Insurance:"))),
+    ],
+    'Luis and Gerardo Filter': [
+        ('rep filter', lambda at: _widget(at.radio, "Select Filter:").set_value('Gerardo')),
+        ('name search', lambda at: _widget(at.text_input, "Search for a doctor by name:").input(_search_part(at))),
+    ],
+    'Territory Map': [
+        ('radius', lambda at: _widget(at.slider, "Radius (miles):").set_value(10)),
+    ],
+}
+
+
+def _peak_mb():
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_app(directory):
+    """Run every page in `directory` (a dataset written by synthetic_data.py); one result dict per step."""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(directory)
+    results = []
+
+    def step(page, action, interact):
+        start = time.perf_counter()
+        interact(at)
+        at.run()
+        results.append({'page': page, 'step': action, 'seconds': time.perf_counter() - start,
+                        'peak_mb': _peak_mb(), 'errors': [str(e.value) for e in at.exception]})
+
+    at = AppTest.from_file(APP, default_timeout=TIMEOUT)
+    at.run()
+    step('', 'load', lambda at: at.sidebar.text_input[0].input(PASSWORD))
+    for page, interactions in PAGES.items():
+        step(page, 'open', lambda at, page=page: at.sidebar.selectbox(key='navigation').select(page))
+        for action, interact in interactions:
+            step(page, action, interact)
+    return results
+
+
+def main(scales):
+    from synthetic_data import write_dataset
+
+    print(f"{'scale':>6} {'page':<28} {'step':<18} {'seconds':>8} {'peak MB':>8}")
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"cms_x{scale}_") as directory:
+            write_dataset(directory, scale)
+            # A new process per scale, so caches and peak memory start from zero
+            child = subprocess.run([sys.executable, os.path.abspath(__file__), '--run', directory],
+                                   capture_output=True, text=True, check=True)
+            for result in json.loads(child.stdout.splitlines()[-1]):
+                errors = f"  ERROR: {result['errors'][0]}" if result['errors'] else ''
+                print(f"{scale:>5}x {result['page']:<28} {result['step']:<18} "
+                      f"{result['seconds']:8.3f} {result['peak_mb']:8.0f}{errors}")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--run']:
+        print(json.dumps(run_app(sys.argv[2])))
+    else:
+        main([int(scale) for scale in sys.argv[1:]] or [1, 10, 100])
@@ -0,0 +1,72 @@
+"""Display formatting on a 1M-row synthetic frame: per-row apply lambdas vs formatting.py.
+
+Run from the repository root:
+
+    python benchmarks/bench_formatting.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formatting import column_config, format_flag  # noqa: E402
+
+
+def synthetic_frame(rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    cagr = rng.normal(0, 0.4, rows)
+    cagr[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        'CAGR': cagr,
+        'Luis, Gerardo o Alex': rng.choice(['', '', '', 'Luis', 'Gerardo', 'Alex'], rows),
+        'Avg Payment': rng.uniform(50, 2500, rows),
+        'Margin': rng.uniform(-40, 95, rows),
+    })
+
+
+# The per-element lambdas interface.py used to apply
+def format_with_apply(df):
+    df = df.copy()
+    df['CAGR'] = pd.to_numeric(df['CAGR'], errors='coerce').apply(lambda x: f"{x * 100:.1f}%" if pd.notna(x) else "N/A")
+    df['Luis, Gerardo o Alex'] = df['Luis, Gerardo o Alex'].apply(lambda x: f"YES, {x}" if x else "NO")
+    df['Avg Payment'] = pd.to_numeric(df['Avg Payment'], errors='coerce').apply(lambda x: f"${x:.2f}" if pd.notna(x) else "N/A")
+    df['Margin'] = pd.to_numeric(df['Margin'], errors='coerce').apply(lambda x: f"{int(x)}%" if pd.notna(x) else "N/A")
+    return df
+
+
+# Numbers stay numbers; only the text flag is built, with one vectorized pass
+def format_vectorized(df):
+    df = df.assign(**{'Luis, Gerardo o Alex': format_flag(df['Luis, Gerardo o Alex'])})
+    return df, column_config(df)
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    df = synthetic_frame()
+    before = timed(format_with_apply, df)
+    after = timed(format_vectorized, df)
+    print(f"rows: {len(df):,}")
+    print(f"apply lambdas:        {before * 1000:9.1f} ms")
+    print(f"formatting.py:        {after * 1000:9.1f} ms  ({before / after:.0f}x faster)")
+
+    # Sorting: text margins sort lexicographically ('9%' > '85%'), numbers don't
+    text_sorted = format_with_apply(df.head(1000)).sort_values(by='Margin', ascending=False)['Margin']
+    numeric_sorted = df.head(1000).sort_values(by='Margin', ascending=False)['Margin']
+    print(f"text Margin sort monotonic:    {pd.to_numeric(text_sorted.str.rstrip('%')).is_monotonic_decreasing}")
+    print(f"numeric Margin sort monotonic: {numeric_sorted.is_monotonic_decreasing}")
+
+
+if __name__ == '__main__':
+    main()
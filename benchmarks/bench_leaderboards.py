@@ -0,0 +1,79 @@
+"""Home page selectbox-switch latency: per-rerun pipeline vs materialized leaderboards.
+
+Run from the repository root:
+
+    python benchmarks/bench_leaderboards.py
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_model import build_model  # noqa: E402
+from data_store import load_frames  # noqa: E402
+from rankings import build_leaderboards, join_unique  # noqa: E402
+
+
+# The filter -> sort -> dedupe -> merge -> apply pipeline the Home page ran on every switch
+def procedure_ranking_per_rerun(procedure_prioritization_df, doctor_matching_df, selected_procedure):
+    filtered = procedure_prioritization_df[
+        (procedure_prioritization_df['Procedure'] == selected_procedure) &
+        (procedure_prioritization_df['Prioritization Index Procedure'].notna())
+    ].sort_values(by='Prioritization Index Procedure', ascending=False).drop_duplicates(subset='Referring Physician').reset_index(drop=True)
+    filtered['Rank'] = filtered.index + 1
+    filtered = filtered.merge(doctor_matching_df[['Referring Physician', 'Luis, Gerardo o Alex']].drop_duplicates(subset='Referring Physician'), on='Referring Physician', how='left')
+    filtered['Luis, Gerardo o Alex'] = filtered['Luis, Gerardo o Alex'].apply(lambda x: f"YES, {x}" if x else "NO")
+    filtered['CAGR'] = pd.to_numeric(filtered['CAGR'], errors='coerce').apply(lambda x: f"{x*100:.1f}%" if pd.notna(x) else "N/A")
+    return filtered[['Rank', 'Referring Physician', 'Procedure', 'CAGR', 'Referrals', 'Luis, Gerardo o Alex']]
+
+
+def specialty_ranking_per_rerun(doctor_matching_df, selected_specialty):
+    filtered = doctor_matching_df[
+        doctor_matching_df['Specialty'] == selected_specialty
+    ].sort_values(by='Prioritization Index', ascending=False).drop_duplicates(subset='Referring Physician').reset_index(drop=True)
+    filtered['Rank'] = filtered.index + 1
+    filtered['Insurance'] = filtered.groupby('Referring Physician', observed=True)['Insurance'].transform(join_unique)
+    filtered['Luis, Gerardo o Alex'] = filtered['Luis, Gerardo o Alex'].apply(lambda x: f"YES, {x}" if x else "NO")
+    return filtered[['Rank', 'Referring Physician', 'Specialty', 'Insurance', 'Referrals', 'Luis, Gerardo o Alex']]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(repeat=20):
+    model = build_model(*load_frames())
+    doctor_matching_df, procedure_prioritization_df = model.doctor_matching, model.procedure_prioritization
+
+    start = time.perf_counter()
+    leaderboards = build_leaderboards(doctor_matching_df, procedure_prioritization_df)
+    build_seconds = time.perf_counter() - start
+
+    procedures = list(leaderboards.by_procedure)
+    specialties = list(leaderboards.by_specialty)
+
+    rows = [
+        ('procedure switch', procedures,
+         lambda: [procedure_ranking_per_rerun(procedure_prioritization_df, doctor_matching_df, p) for p in procedures],
+         lambda: [leaderboards.by_procedure[p] for p in procedures]),
+        ('specialty switch', specialties,
+         lambda: [specialty_ranking_per_rerun(doctor_matching_df, s) for s in specialties],
+         lambda: [leaderboards.by_specialty[s] for s in specialties]),
+    ]
+
+    print(f"build_leaderboards (one-off, per data version): {build_seconds * 1000:.1f} ms")
+    print(f"{'selectbox':<18}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>12}")
+    for label, keys, before, after in rows:
+        before_ms = timed(before, repeat) / len(keys) * 1000
+        after_ms = timed(after, repeat) / len(keys) * 1000
+        print(f"{label:<18}{before_ms:>14.3f}{after_ms:>14.5f}{before_ms / after_ms:>11.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Scoring engine on synthetic referral rows: full fit vs incremental updates.
+
+Run from the repository root:
+
+    python benchmarks/bench_scoring.py [rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import ScoringEngine, load_payments  # noqa: E402
+
+PROCEDURES = ['Ultra Sound', 'Xray', 'Mammogram', 'CT', 'Open MRI', 'MRI', 'Bone Density',
+              'Sleep Study', 'Nuclear Medicine', 'NCS', 'Cardiac Pet', 'EEG', 'Onco Pet']
+INSURANCES = ['OSCAR', 'AETNA', 'BCBS', 'PCP', 'HUMANA', 'UHC', 'SIMPLY', 'MEDICARE', 'CAREPLUS', 'SELF PAY']
+
+
+def synthetic_referrals(rows, physicians=20_000, months=24, seed=0):
+    rng = np.random.default_rng(seed)
+    # Heavy-tailed referral volume, like the real data
+    weights = rng.pareto(1.2, physicians) + 1
+    doctor = rng.choice(physicians, rows, p=weights / weights.sum())
+    start = pd.Timestamp('2023-01-01')
+    days = rng.integers(0, months * 30, rows)
+    return pd.DataFrame({
+        'Referring Physician': pd.Categorical.from_codes(doctor, [f"DOCTOR {i:05d}, NAME" for i in range(physicians)]).astype(str),
+        'Insurance': rng.choice(INSURANCES, rows),
+        'Procedure': rng.choice(PROCEDURES, rows),
+        'Date': start + pd.to_timedelta(days, unit='D'),
+    }).sort_values('Date', kind='mergesort', ignore_index=True)
+
+
+def main(rows=1_000_000):
+    payments = load_payments()
+    referrals = synthetic_referrals(rows)
+    last_month = referrals['Date'].dt.to_period('M').max()
+    history = referrals[referrals['Date'].dt.to_period('M') < last_month]
+    new_month = referrals[referrals['Date'].dt.to_period('M') == last_month]
+
+    start = time.perf_counter()
+    ScoringEngine(payments, as_of=None).fit(referrals)
+    print(f"full fit, {len(referrals):,} rows:                 {time.perf_counter() - start:6.2f} s")
+
+    engine = ScoringEngine(payments, as_of=None).fit(history)
+    start = time.perf_counter()
+    changed = engine.update(new_month)
+    print(f"update with a new month, {len(new_month):,} rows:      {time.perf_counter() - start:6.2f} s "
+          f"({len(changed['doctors']):,} doctors rescored: the CAGR window moved)")
+
+    # Late-arriving rows for the current window: their physicians change, plus those
+    # whose index depends on a max referrals / profitability cap the rows moved
+    for late_rows in [200, len(referrals) // 100]:
+        late = new_month.sample(min(late_rows, len(new_month)), random_state=1)
+        engine = ScoringEngine(payments, as_of=str(last_month)).fit(referrals.drop(late.index))
+        start = time.perf_counter()
+        changed = engine.update(late)
+        print(f"update with {len(late):,} late rows in the same window: {time.perf_counter() - start:6.2f} s "
+              f"({len(changed['doctors']):,} doctors, {len(changed['procedures']):,} doctor/procedure pairs rescored)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,124 @@
+"""Synthetic workbook data at N times the size of the real one.
+
+Every sheet (Doctor_Matching, Procedure_Prioritization, Insurance Payment
+Avgs) is the real sheet repeated `scale` times with the same columns and
+dtypes. Copy k > 0 renames its physicians and insurance networks with a
+letter tag ('SMITH, JOHN BK'; letters, so the copies stay distinct for the
+name search) and jitters the numbers and coordinates. The result keeps the
+real value distributions, specialties and procedures while every key
+column grows with the scale.
+
+Run from the repository root to write a directory the app can be started in:
+
+    python benchmarks/synthetic_data.py 100 --out /tmp/cms_x100
+    cd /tmp/cms_x100 && streamlit run /path/to/interface.py
+"""
+import argparse
+import os
+import shutil
+import string
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_store import SNAPSHOT_DIR, SOURCE_FILE, load_frames, write_snapshot  # noqa: E402
+
+EXPLANATION_FILE = 'Explicacion_Indice_Priorizacion_Doctor_Procedimientos.docx'
+
+
+def copy_tag(copy):
+    """0 -> '', 1 -> ' B', 26 -> ' BA': a letters-only suffix per copy."""
+    if copy == 0:
+        return ''
+    letters = ''
+    while copy:
+        copy, digit = divmod(copy, 26)
+        letters = string.ascii_uppercase[digit] + letters
+    return ' ' + letters
+
+
+def _tagged(values, copies, tags):
+    values = pd.Series(np.asarray(values, dtype=object)[np.tile(np.arange(len(values)), copies)])
+    suffixes = np.repeat(tags, len(values) // copies)
+    return values.where(values.isna(), values.astype(str) + suffixes)
+
+
+def _jitter(values, copies, rng, scale=None, shift=None):
+    values = np.tile(np.asarray(values, dtype='float64'), copies)
+    n = len(values) // copies
+    # Copy 0 keeps the real numbers
+    if scale is not None:
+        values[n:] *= rng.uniform(1 - scale, 1 + scale, len(values) - n)
+    if shift is not None:
+        values[n:] += rng.normal(0, shift, len(values) - n)
+    return values
+
+
+def synthetic_frames(scale, seed=0, base=None):
+    """{snapshot name: DataFrame} with `scale` copies of every sheet of `base` (default: the real workbook)."""
+    if base is None:
+        base, _ = load_frames(os.path.join(ROOT, SOURCE_FILE), os.path.join(ROOT, SNAPSHOT_DIR))
+    rng = np.random.default_rng(seed)
+    tags = np.array([copy_tag(copy) for copy in range(scale)], dtype=object)
+
+    def repeat(df):
+        return df.iloc[np.tile(np.arange(len(df)), scale)].reset_index(drop=True)
+
+    dm = repeat(base['doctor_matching'])
+    dm['Referring Physician'] = _tagged(base['doctor_matching']['Referring Physician'], scale, tags)
+    dm['Insurance'] = _tagged(base['doctor_matching']['Insurance'], scale, tags)
+    dm['Referrals'] = np.maximum(1, np.rint(_jitter(base['doctor_matching']['Referrals'], scale, rng, scale=0.3))).astype('int64')
+    dm['CAGR'] = _jitter(base['doctor_matching']['CAGR'], scale, rng, shift=0.05)
+    dm['Prioritization Index'] = _jitter(base['doctor_matching']['Prioritization Index'], scale, rng, scale=0.1)
+    # About a mile, so copies spread around the real locations
+    dm['Latitude'] = _jitter(base['doctor_matching']['Latitude'], scale, rng, shift=0.015)
+    dm['Longitude'] = _jitter(base['doctor_matching']['Longitude'], scale, rng, shift=0.015)
+
+    pp = repeat(base['procedure_prioritization'])
+    pp['Referring Physician'] = _tagged(base['procedure_prioritization']['Referring Physician'], scale, tags)
+    pp['Referrals'] = np.maximum(1, np.rint(_jitter(base['procedure_prioritization']['Referrals'], scale, rng, scale=0.3))).astype('int64')
+    pp['CAGR'] = _jitter(base['procedure_prioritization']['CAGR'], scale, rng, shift=0.05)
+    pp['Prioritization Index Procedure'] = _jitter(base['procedure_prioritization']['Prioritization Index Procedure'],
+                                                   scale, rng, scale=0.1)
+
+    ip = repeat(base['insurance_payments'])
+    ip['Insurance'] = _tagged(base['insurance_payments']['Insurance'], scale, tags)
+    ip['Avg Payment'] = _jitter(base['insurance_payments']['Avg Payment'], scale, rng, scale=0.2)
+    ip['Margin'] = _jitter(base['insurance_payments']['Margin'], scale, rng, shift=5)
+
+    return {'doctor_matching': dm, 'procedure_prioritization': pp, 'insurance_payments': ip}
+
+
+def write_dataset(directory, scale, seed=0):
+    """Write a directory the app runs in unchanged, with the synthetic frames as its data.
+
+    The frames go straight into the Feather snapshot. SOURCE_FILE is a small
+    stub whose hash becomes the data version, so nothing is written to or
+    parsed from Excel.
+    """
+    os.makedirs(directory, exist_ok=True)
+    source = os.path.join(directory, SOURCE_FILE)
+    with open(source, 'w') as f:
+        f.write(f"synthetic data, {scale}x the real workbook, seed {seed}\n")
+    shutil.copy(os.path.join(ROOT, EXPLANATION_FILE), directory)
+    frames = synthetic_frames(scale, seed)
+    write_snapshot(frames, source, os.path.join(directory, SNAPSHOT_DIR))
+    return {name: len(df) for name, df in frames.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic copy of the workbook data at N times its size.")
+    parser.add_argument('scale', type=int, help="e.g. 10, 100 or 1000")
+    parser.add_argument('--out', required=True, help="directory to write (run the app from there)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    rows = write_dataset(args.out, args.scale, args.seed)
+    print(f"{args.scale}x -> {args.out}: " + ", ".join(f"{name} {count:,} rows" for name, count in rows.items()))
+
+
+if __name__ == '__main__':
+    main()
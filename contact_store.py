@@ -0,0 +1,88 @@
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+CONTACT_DB = 'contact_events.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contact_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    physician TEXT NOT NULL,
+    contacted_at TEXT NOT NULL,
+    rep TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS contact_events_physician ON contact_events (physician, contacted_at);
+"""
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ContactStore:
+    """Append-only log of "Mark as Contacted" events in SQLite.
+
+    Each click is one INSERT, so writes don't grow with the data and never
+    touch the workbook. WAL mode lets every session read while another
+    writes; concurrent writers queue on SQLite's lock instead of
+    overwriting each other. Connections are opened per call, so the store
+    can be shared across Streamlit's session threads.
+    """
+
+    def __init__(self, path=CONTACT_DB, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def record_contact(self, physician, rep='', contacted_at=None):
+        contacted_at = contacted_at or datetime.now().strftime(TIMESTAMP_FORMAT)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('INSERT INTO contact_events (physician, contacted_at, rep) VALUES (?, ?, ?)',
+                         (str(physician), contacted_at, rep or ''))
+        return contacted_at
+
+    def history(self, physicians=None):
+        """Contact events, newest first, optionally limited to some physicians."""
+        query = 'SELECT physician, contacted_at, rep FROM contact_events'
+        if physicians is not None:
+            names = [(str(p),) for p in physicians]
+            if not names:
+                return pd.DataFrame(columns=['Referring Physician', 'Contact_DateTime', 'Rep'])
+            # Stage the names in a temp table so large filters still use the index
+            with closing(self._connect()) as conn:
+                conn.execute('CREATE TEMP TABLE wanted (physician TEXT PRIMARY KEY)')
+                conn.executemany('INSERT OR IGNORE INTO wanted VALUES (?)', names)
+                return self._frame(conn, query + ' WHERE physician IN (SELECT physician FROM wanted)'
+                                   ' ORDER BY contacted_at DESC, id DESC')
+        with closing(self._connect()) as conn:
+            return self._frame(conn, query + ' ORDER BY contacted_at DESC, id DESC')
+
+    def last_contacts(self):
+        """physician -> latest contact timestamp, served from the (physician, contacted_at) index."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT physician, MAX(contacted_at) FROM contact_events GROUP BY physician').fetchall()
+        return pd.Series(dict(rows), dtype=object, name='Last Contacted')
+
+    def last_contact(self, physician):
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT MAX(contacted_at) FROM contact_events WHERE physician = ?',
+                               (str(physician),)).fetchone()
+        return row[0]
+
+    @staticmethod
+    def _frame(conn, query):
+        rows = conn.execute(query).fetchall()
+        return pd.DataFrame(rows, columns=['Referring Physician', 'Contact_DateTime', 'Rep'])
+
+
+def with_contact_status(df, last_contacts):
+    """Copy of a leaderboard with a 'Last Contacted' column ('' when never contacted)."""
+    contacted = df['Referring Physician'].astype(str).map(last_contacts).fillna('')
+    return df.assign(**{'Last Contacted': contacted.to_numpy()})
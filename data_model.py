@@ -0,0 +1,118 @@
+import zlib
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Low-cardinality labels shared across sheets; one dtype per label so that
+# comparisons and merges between sheets stay on category codes.
+CATEGORICAL_COLUMNS = ['Referring Physician', 'Specialty', 'Insurance', 'Procedure']
+
+FLOAT_COLUMNS = [
+    'Prioritization Index', 'Prioritization Index Procedure', 'CAGR', 'Dropoff Weight',
+    'Capped Profitability', 'Priority Boost', 'Avg Payment', 'Margin', 'Percentage',
+    'Latitude', 'Longitude', 'Distance from CMS (kms)', 'Distance from CMS (miles)',
+]
+
+
+def _shared_dtypes(frames):
+    dtypes = {}
+    for col in CATEGORICAL_COLUMNS:
+        values = [df[col].dropna().astype(str) for df in frames.values() if col in df.columns]
+        if values:
+            dtypes[col] = pd.CategoricalDtype(sorted(pd.concat(values).unique()))
+    return dtypes
+
+
+def _read_only(values):
+    values = np.array(values, copy=True)
+    values.flags.writeable = False
+    return values
+
+
+def normalize_frame(df, dtypes):
+    columns = {}
+    for col in df.columns:
+        if col in dtypes:
+            columns[col] = df[col].astype(str).where(df[col].notna()).astype(dtypes[col])
+        elif col in FLOAT_COLUMNS:
+            columns[col] = _read_only(pd.to_numeric(df[col], errors='coerce').astype('float64'))
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            columns[col] = _read_only(df[col].to_numpy())
+        else:
+            # Free text (addresses, phone numbers, the Luis/Gerardo flags) is only
+            # ever displayed, so blanks stay as empty strings.
+            columns[col] = _read_only(df[col].fillna('').astype(str).to_numpy(dtype=object))
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(df)), copy=False)
+
+
+def _backing(column):
+    """The array object a column's values live in; assigning the column replaces it."""
+    values = column.array
+    if isinstance(values, pd.Categorical):
+        values = values.codes
+    elif isinstance(values, pd.arrays.NumpyExtensionArray):
+        values = values.to_numpy()
+    # Views are made on every access; the array that owns the memory is not
+    while isinstance(values, np.ndarray) and values.base is not None:
+        values = values.base
+    return values
+
+
+def _fingerprint(df):
+    """(structure, backing arrays): the arrays are kept, so they are compared by identity and never reused."""
+    codes = [
+        zlib.crc32(np.ascontiguousarray(df[col].cat.codes.to_numpy()).tobytes())
+        for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)
+    ]
+    structure = df.shape, tuple(df.columns), tuple(map(str, df.dtypes)), tuple(codes)
+    return structure, tuple(_backing(df[col]) for col in df.columns)
+
+
+def _unchanged(df, expected):
+    structure, backing = _fingerprint(df)
+    return structure == expected[0] and all(a is b for a, b in zip(backing, expected[1]))
+
+
+@dataclass(frozen=True)
+class DataModel:
+    """Read-only, normalized view of the workbook shared by every session.
+
+    Pages must treat the frames as immutable: derive new frames with
+    filtering/assign/merge instead of writing into these. Numeric and text
+    columns are backed by read-only arrays so in-place writes raise.
+    check_unchanged() catches what slips past that at the end of a run:
+    new or dropped columns, changed dtypes or category codes, and any column
+    replaced by assignment (df[col] = ...), even with the same dtype.
+    """
+    doctor_matching: pd.DataFrame
+    procedure_prioritization: pd.DataFrame
+    insurance_payments: pd.DataFrame
+    version: str
+    _fingerprints: tuple = field(default=(), repr=False, compare=False)
+
+    def frames(self):
+        return {
+            'doctor_matching': self.doctor_matching,
+            'procedure_prioritization': self.procedure_prioritization,
+            'insurance_payments': self.insurance_payments,
+        }
+
+    def check_unchanged(self):
+        for (name, df), expected in zip(self.frames().items(), self._fingerprints):
+            if not _unchanged(df, expected):
+                raise RuntimeError(f"Shared data model '{name}' was modified in place; "
+                                   "copy the frame before changing it.")
+
+
+def build_model(frames, version):
+    dtypes = _shared_dtypes(frames)
+    normalized = {name: normalize_frame(df, dtypes) for name, df in frames.items()}
+    return DataModel(
+        doctor_matching=normalized['doctor_matching'],
+        procedure_prioritization=normalized['procedure_prioritization'],
+        insurance_payments=normalized['insurance_payments'],
+        version=version,
+        _fingerprints=tuple(_fingerprint(normalized[name]) for name in
+                            ('doctor_matching', 'procedure_prioritization', 'insurance_payments')),
+    )
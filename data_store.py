@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow.feather as feather
+
+SOURCE_FILE = 'Updated_Doctor_Matching_with_Luis_Gerardo_Status.xlsx'
+SNAPSHOT_DIR = '.snapshots'
+
+# Snapshot name -> sheet in the source workbook
+SHEETS = {
+    'doctor_matching': 'Doctor_Matching',
+    'procedure_prioritization': 'Procedure_Prioritization',
+    'insurance_payments': 'Insurance Payment Avgs',
+}
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest(snapshot_dir):
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_manifest(snapshot_dir, manifest):
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+    _write_atomic(os.path.join(snapshot_dir, MANIFEST_NAME), write)
+
+
+def _snapshot_path(snapshot_dir, name):
+    return os.path.join(snapshot_dir, f"{name}.feather")
+
+
+def _snapshot_complete(snapshot_dir):
+    return all(os.path.exists(_snapshot_path(snapshot_dir, name)) for name in SHEETS)
+
+
+# Columns such as 'Postal Code' and 'Phone Number' mix ints and strings in the
+# workbook; Arrow needs a single type per column, so keep them as text.
+def _arrow_safe(df):
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def build_snapshot(file_path=SOURCE_FILE, snapshot_dir=SNAPSHOT_DIR, sha256=None):
+    """Parse the workbook once and write one uncompressed Feather file per sheet."""
+    with pd.ExcelFile(file_path) as workbook:
+        frames = {name: workbook.parse(sheet) for name, sheet in SHEETS.items()}
+    return write_snapshot(frames, file_path, snapshot_dir, sha256)
+
+
+def write_snapshot(frames, file_path=SOURCE_FILE, snapshot_dir=SNAPSHOT_DIR, sha256=None):
+    """Write {snapshot name: DataFrame} as the snapshot of `file_path`.
+
+    Also used to serve generated frames (see benchmarks/synthetic_data.py)
+    through the normal loading path without writing them to Excel.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    stat = os.stat(file_path)
+    sha256 = sha256 or file_sha256(file_path)
+
+    for name in SHEETS:
+        df = _arrow_safe(frames[name])
+        # Uncompressed so the file can be memory-mapped on load
+        _write_atomic(_snapshot_path(snapshot_dir, name),
+                      lambda tmp_path, df=df: feather.write_feather(df, tmp_path, compression='uncompressed'))
+
+    _write_manifest(snapshot_dir, {
+        'source': os.path.basename(file_path),
+        'sha256': sha256,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sheets': SHEETS,
+    })
+    # Serve the Arrow round-tripped frames so cold and warm starts see identical dtypes
+    return read_snapshot(snapshot_dir)
+
+
+def snapshot_is_fresh(file_path=SOURCE_FILE, snapshot_dir=SNAPSHOT_DIR):
+    """Return (fresh, sha256) for the snapshot against the current workbook.
+
+    A matching mtime and size is trusted without hashing. If only the mtime
+    moved (e.g. the file was copied or touched), the content hash decides and
+    the manifest is refreshed so the next start takes the fast path again.
+    """
+    manifest = _read_manifest(snapshot_dir)
+    if (manifest is None or manifest.get('sheets') != SHEETS
+            or manifest.get('source') != os.path.basename(file_path)
+            or not _snapshot_complete(snapshot_dir)):
+        return False, None
+
+    stat = os.stat(file_path)
+    if manifest['mtime_ns'] == stat.st_mtime_ns and manifest['size'] == stat.st_size:
+        return True, manifest['sha256']
+
+    sha256 = file_sha256(file_path)
+    if sha256 != manifest['sha256']:
+        return False, sha256
+
+    manifest.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    _write_manifest(snapshot_dir, manifest)
+    return True, sha256
+
+
+def read_snapshot(snapshot_dir=SNAPSHOT_DIR):
+    return {
+        name: feather.read_table(_snapshot_path(snapshot_dir, name), memory_map=True).to_pandas()
+        for name in SHEETS
+    }
+
+
+def load_frames(file_path=SOURCE_FILE, snapshot_dir=SNAPSHOT_DIR):
+    """Return ({snapshot name: DataFrame}, data version) for the workbook.
+
+    The snapshot is rebuilt only when the workbook changed since it was written.
+    The data version is the workbook's content hash and changes with it.
+    """
+    fresh, sha256 = snapshot_is_fresh(file_path, snapshot_dir)
+    if fresh:
+        try:
+            return read_snapshot(snapshot_dir), sha256
+        except (OSError, ValueError):
+            pass  # Corrupt or partially written snapshot, fall through and rebuild
+
+    sha256 = sha256 or file_sha256(file_path)
+    return build_snapshot(file_path, snapshot_dir, sha256), sha256
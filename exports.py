@@ -0,0 +1,124 @@
+import re
+from io import BytesIO, StringIO
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+from cache import LRUCache
+from formatting import XLSX_NUMBER_FORMATS
+
+# Download format -> (file extension, MIME type)
+FORMATS = {
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('csv', 'text/csv'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+EXPORT_CACHE_SIZE = 32
+
+# Generated file bytes keyed by (table, selection, data version, format), so a
+# new workbook version never serves stale files and old versions age out
+export_cache = LRUCache(EXPORT_CACHE_SIZE)
+
+
+def sheet_title(name, used=()):
+    # Excel sheet names: max 31 characters, no []:*?/\ and unique per workbook
+    title = re.sub(r'[\[\]:*?/\\]', ' ', str(name)).strip()[:31] or 'Sheet'
+    candidate, n = title, 2
+    while candidate in used:
+        suffix = f" ({n})"
+        candidate, n = title[:31 - len(suffix)] + suffix, n + 1
+    return candidate
+
+
+def _rows(df, worksheet):
+    # Excel has no NaN; write blanks instead
+    yield list(df.columns)
+    values = df.astype(object).where(df.notna(), None)
+    formats = [XLSX_NUMBER_FORMATS.get(col) for col in df.columns]
+    if not any(formats):
+        yield from values.itertuples(index=False, name=None)
+        return
+    # Keep the numbers numeric in the file; Excel applies the display format
+    for row in values.itertuples(index=False, name=None):
+        cells = []
+        for value, number_format in zip(row, formats):
+            if number_format and value is not None:
+                cell = WriteOnlyCell(worksheet, value=value)
+                cell.number_format = number_format
+                value = cell
+            cells.append(value)
+        yield cells
+
+
+def write_xlsx(sheets):
+    """Stream (sheet name, DataFrame) pairs into a write-only workbook.
+
+    Rows are appended as they are produced, so `sheets` can be a generator and
+    only one table needs to be materialized at a time.
+    """
+    workbook = Workbook(write_only=True)
+    used = set()
+    for name, df in sheets:
+        title = sheet_title(name, used)
+        used.add(title)
+        worksheet = workbook.create_sheet(title)
+        for row in _rows(df, worksheet):
+            worksheet.append(row)
+    if not used:
+        workbook.create_sheet('Sheet')
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def to_bytes(df, fmt, sheet_name='Sheet1'):
+    if fmt == 'xlsx':
+        return write_xlsx([(sheet_name, df)])
+    if fmt == 'csv':
+        text = StringIO()
+        df.to_csv(text, index=False)
+        return text.getvalue().encode('utf-8')
+    if fmt == 'parquet':
+        buffer = BytesIO()
+        # Display tables can mix types in a column (e.g. 'N/A' next to numbers);
+        # blanks stay null rather than becoming the string 'nan'
+        df.assign(**{col: df[col].astype(str).where(df[col].notna(), None)
+                     for col in df.columns if df[col].dtype == object}).to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def export_table(table, selection, version, fmt, get_frame, sheet_name='Sheet1'):
+    """Bytes for one table, generated on first request and memoized per data version."""
+    return export_cache.get((table, selection, version, fmt),
+                            lambda: to_bytes(get_frame(), fmt, sheet_name))
+
+
+def bundle_bytes(tables, fmt, label):
+    """Every table in `tables` ({name: DataFrame}) as a single file.
+
+    xlsx gets one sheet per table; csv and parquet get one long table with a
+    `label` column naming the table each row belongs to.
+    """
+    if fmt == 'xlsx':
+        return write_xlsx((name, df) for name, df in tables.items())
+    combined = pd.concat(
+        [df.assign(**{label: name}) for name, df in tables.items()],
+        ignore_index=True)
+    combined = combined[[label] + [col for col in combined.columns if col != label]]
+    return to_bytes(combined, fmt)
+
+
+def export_all(table, version, fmt, tables, label):
+    """bundle_bytes() for a download button, memoized per data version."""
+    return export_cache.get((table, '*', version, fmt), lambda: bundle_bytes(tables, fmt, label))
+
+
+def file_name(stem, fmt):
+    return f"{stem}.{FORMATS[fmt][0]}"
+
+
+def mime_type(fmt):
+    return FORMATS[fmt][1]
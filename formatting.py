@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+# Display formats for numeric columns. Frames keep the raw numbers (so they
+# sort numerically in the table widget and in exports); formats are only
+# applied when rendering, by Streamlit's column config or Excel number formats.
+#   CAGR: fraction, shown as a percentage
+#   Margin: already in percent points, rounded to a whole percent (as Excel's 0"%" does)
+#   Avg Payment: dollars
+DISPLAY_FORMATS = {
+    'CAGR': 'percent',
+    'Avg Payment': 'dollar',
+    'Margin': '%.0f%%',
+    'Prioritization Index': '%.3f',
+    'Prioritization Index Procedure': '%.3f',
+    'Distance (miles)': '%.2f',
+    'Expected Revenue': 'dollar',
+    'Expected Profit': 'dollar',
+}
+
+XLSX_NUMBER_FORMATS = {
+    'CAGR': '0.0%',
+    'Avg Payment': '$#,##0.00',
+    'Margin': '0"%"',
+    'Expected Revenue': '$#,##0.00',
+    'Expected Profit': '$#,##0.00',
+}
+
+
+def column_config(df, like=None):
+    """st.dataframe column_config for the formatted numeric columns present in df.
+
+    `like` formats every column as that DISPLAY_FORMATS column instead, for
+    pivot tables whose columns are values (e.g. insurances) rather than names.
+    """
+    import streamlit as st
+    if like is not None:
+        return {col: st.column_config.NumberColumn(str(col), format=DISPLAY_FORMATS[like]) for col in df.columns}
+    return {col: st.column_config.NumberColumn(col, format=fmt)
+            for col, fmt in DISPLAY_FORMATS.items() if col in df.columns}
+
+
+def format_flag(values):
+    """'Luis, Gerardo o Alex' source -> 'YES, <source>' or 'NO' for blanks."""
+    text = pd.Series(values).astype(object).fillna('').astype(str).to_numpy(dtype=object)
+    return np.where(text != '', 'YES, ' + text, 'NO')
+
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# CMS Diagnostic Services
+CMS_LOCATION = (25.701410, -80.342660)
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LATITUDE = np.pi * EARTH_RADIUS_MILES / 180
+
+# First search radius of SpatialIndex.nearest; doubled until it holds k physicians
+NEAREST_START_MILES = 1.0
+
+POINT_COLUMNS = ['Referring Physician', 'Specialty', 'Address', 'Prioritization Index', 'Latitude', 'Longitude']
+
+
+def haversine_miles(lat, lon, lats, lons):
+    """Great-circle distance in miles from (lat, lon) to every point in the lats/lons arrays."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = (np.sin((lats - lat) / 2) ** 2
+         + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+@dataclass(frozen=True)
+class SpatialIndex:
+    """Doctor locations sorted by latitude.
+
+    A radius query binary-searches the latitude band that can contain
+    matches and computes exact haversine distances only for that band, so
+    it stays cheap as the roster grows. Each row is one (physician,
+    location) pair; a physician listed at several addresses has several
+    points.
+    """
+    points: pd.DataFrame
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+
+    def __len__(self):
+        return len(self.points)
+
+    def _band(self, lat, miles):
+        delta = miles / MILES_PER_DEGREE_LATITUDE
+        return (np.searchsorted(self.latitudes, lat - delta, side='left'),
+                np.searchsorted(self.latitudes, lat + delta, side='right'))
+
+    def within(self, lat, lon, miles):
+        """Physicians with a location within `miles`, highest Prioritization Index first.
+
+        Each physician appears once, at their closest location.
+        """
+        start, stop = self._band(lat, miles)
+        distances = haversine_miles(lat, lon, self.latitudes[start:stop], self.longitudes[start:stop])
+        hits = np.flatnonzero(distances <= miles)
+        found = self.points.iloc[start + hits].assign(**{'Distance (miles)': distances[hits]})
+        return (found
+                .sort_values(by='Distance (miles)', kind='mergesort')
+                .drop_duplicates(subset='Referring Physician')
+                .sort_values(by=['Prioritization Index', 'Distance (miles)'], ascending=[False, True],
+                             na_position='last', kind='mergesort')
+                .reset_index(drop=True))
+
+    def nearest(self, lat, lon, k=10):
+        """The k physicians closest to (lat, lon), nearest first.
+
+        Searches a circle that doubles in radius until it holds k distinct
+        physicians; only once the latitude band spans every point is the
+        whole index scanned.
+        """
+        miles = NEAREST_START_MILES
+        while True:
+            start, stop = self._band(lat, miles)
+            scan_all = start == 0 and stop == len(self)
+            distances = haversine_miles(lat, lon, self.latitudes[start:stop], self.longitudes[start:stop])
+            hits = np.arange(len(distances)) if scan_all else np.flatnonzero(distances <= miles)
+            found = (self.points.iloc[start + hits]
+                     .assign(**{'Distance (miles)': distances[hits]})
+                     .sort_values(by='Distance (miles)', kind='mergesort')
+                     .drop_duplicates(subset='Referring Physician'))
+            # Every physician closer than those found is inside the circle, so k found are the k nearest
+            if scan_all or len(found) >= k:
+                return found.head(k).reset_index(drop=True)
+            miles *= 2
+
+
+def build_spatial_index(doctor_matching_df):
+    points = (doctor_matching_df[POINT_COLUMNS]
+              .dropna(subset=['Latitude', 'Longitude'])
+              .drop_duplicates(subset=['Referring Physician', 'Latitude', 'Longitude'])
+              .sort_values(by='Latitude', kind='mergesort')
+              .reset_index(drop=True))
+    return SpatialIndex(points=points,
+                        latitudes=points['Latitude'].to_numpy(dtype='float64'),
+                        longitudes=points['Longitude'].to_numpy(dtype='float64'))
+
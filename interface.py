@@ -1,15 +1,28 @@
 import streamlit as st
 import pandas as pd
 import folium
-from streamlit_folium import folium_static
+from streamlit_folium import st_folium
 import numpy as np
 import os
-from datetime import datetime
-from io import BytesIO
+from data_store import SOURCE_FILE, load_frames
+from data_model import build_model
+from rankings import REP_COLUMNS, build_leaderboards, build_rank_index, join_unique, rep_rollups
+from exports import FORMATS, export_all, export_cache, export_table, file_name, mime_type
+from contact_store import ContactStore, with_contact_status
+from geo import CMS_LOCATION, build_spatial_index
+from maps import (MAP_HEIGHT, MAP_WIDTH, doctor_map_html, map_cache, marker_json, prebuild_doctor_maps,
+                  territory_base_map)
+from search import build_name_index
+from payments import CUBE_METRICS, build_payment_cube, build_revenue_index
+from formatting import column_config
+from profiling import SectionTimer, cache_stats, profiling_enabled, render_profiling_panel
 
 # Set page configuration (must be the first Streamlit command)
 st.set_page_config(page_title="CMS Doctor Interface 🏥", page_icon="🏥")
 
+# Per-section wall times of this run, shown in the profiling panel
+timer = SectionTimer()
+
 # Simple password authentication
 def check_password():
     st.sidebar.title("Login")
@@ -31,39 +44,93 @@ if 'current_page' not in st.session_state:
 
 if check_password():
     # Load the data (use your own file path)
-    @st.cache_data
-    def load_data():
-        file_path = 'Updated_Doctor_Matching_with_Luis_Gerardo_Status.xlsx'
-        if os.path.exists(file_path):
-            doctor_matching_df = pd.read_excel(file_path, sheet_name='Doctor_Matching')
-            procedure_prioritization_df = pd.read_excel(file_path, sheet_name='Procedure_Prioritization')
-            insurance_payments_df = pd.read_excel(file_path, sheet_name='Insurance Payment Avgs')
-            return doctor_matching_df, procedure_prioritization_df, insurance_payments_df
-        else:
-            st.error("Data file not found. Please ensure the file is uploaded correctly.")
-            st.stop()
-
+    # The workbook is parsed once into a columnar snapshot (see data_store.py);
+    # later starts memory-map the snapshot unless the xlsx has changed.
+    # The normalized model is built once per process and shared read-only by
+    # every session (see data_model.py); a new workbook mtime builds a new one.
+    @cache_stats.cache_resource(max_entries=1)
+    def load_model(source_mtime):
+        frames, version = load_frames(SOURCE_FILE)
+        return build_model(frames, version)
+
+    if not os.path.exists(SOURCE_FILE):
+        st.error("Data file not found. Please ensure the file is uploaded correctly.")
+        st.stop()
+
+    # Global and per-procedure ranks, built once per data version
+    @cache_stats.cache_resource(max_entries=1)
+    def load_rank_index(version, _model):
+        return build_rank_index(_model.doctor_matching, _model.procedure_prioritization)
+
+    # Home page leaderboards for every procedure and specialty, built once per data version
+    @cache_stats.cache_resource(max_entries=1)
+    def load_leaderboards(version, _model):
+        return build_leaderboards(_model.doctor_matching, _model.procedure_prioritization)
+
+    # Luis and Gerardo Filter tables for every rep, built once per data version
+    @cache_stats.cache_resource(max_entries=1)
+    def load_rep_rollups(version, _model):
+        return rep_rollups(_model.doctor_matching)
+
+    # Doctor locations sorted for radius and nearest-neighbor queries, built once per data version
+    @cache_stats.cache_resource(max_entries=1)
+    def load_spatial_index(version, _model):
+        return build_spatial_index(_model.doctor_matching)
+
+    # Territory Map marker array, serialized once per data version
+    @cache_stats.cache_resource(max_entries=1)
+    def load_territory_markers(version, _spatial_index):
+        return marker_json(_spatial_index)
+
+    # Fuzzy physician name search, built once per data version
+    @cache_stats.cache_resource(max_entries=1)
+    def load_name_index(version, _model):
+        return build_name_index(_model.doctor_matching)
+
+    # Warm the profile map cache for the most prioritized doctors in the background,
+    # once per data version
+    @cache_stats.cache_resource(max_entries=1)
+    def start_map_prebuild(version, _model, _leaderboards, top_n=50):
+        top_physicians = _leaderboards.top_doctors['Referring Physician'].head(top_n).astype(str)
+        return prebuild_doctor_maps(top_physicians, version, _model.doctor_matching)
+
+    # Procedure x insurance payment averages and the doctors' expected revenue
+    # per insurance, built once per data version
+    @cache_stats.cache_resource(max_entries=1)
+    def load_payment_cube(version, _model):
+        return build_payment_cube(_model.insurance_payments)
+
+    @cache_stats.cache_resource(max_entries=1)
+    def load_revenue_index(version, _model, _cube):
+        return build_revenue_index(_cube, _model.doctor_matching, _model.procedure_prioritization)
+
+    # Contact events live in their own SQLite log, independent of the workbook
+    @cache_stats.cache_resource()
+    def load_contact_store():
+        return ContactStore()
+
+    timer.section("Load data")
     with st.spinner("Loading data..."):
-        doctor_matching_df, procedure_prioritization_df, insurance_payments_df = load_data()
+        model = load_model(os.stat(SOURCE_FILE).st_mtime_ns)
+        rank_index = load_rank_index(model.version, model)
+        leaderboards = load_leaderboards(model.version, model)
+        start_map_prebuild(model.version, model, leaderboards)
 
-    # Clean the data by filling NaN values in relevant columns
-    doctor_matching_df.fillna('', inplace=True)
-    procedure_prioritization_df.fillna('', inplace=True)
-    insurance_payments_df.fillna('', inplace=True)
-
-    # Convert 'Prioritization Index' to numeric to handle mixed types
-    doctor_matching_df['Prioritization Index'] = pd.to_numeric(doctor_matching_df['Prioritization Index'], errors='coerce')
-    procedure_prioritization_df['Prioritization Index Procedure'] = pd.to_numeric(procedure_prioritization_df['Prioritization Index Procedure'], errors='coerce')
+    # Shared, read-only frames: derive new frames instead of modifying these
+    doctor_matching_df = model.doctor_matching
+    procedure_prioritization_df = model.procedure_prioritization
+    insurance_payments_df = model.insurance_payments
 
 # Main navigation options
     st.sidebar.title("Navigation")
-    page = st.sidebar.selectbox("Go to", ["Home", "Doctor Profile Lookup", "Insurance Payment Averages", "Luis and Gerardo Filter"],
-                            index=["Home", "Doctor Profile Lookup", "Insurance Payment Averages", "Luis and Gerardo Filter"].index(st.session_state.current_page),
+    page = st.sidebar.selectbox("Go to", ["Home", "Doctor Profile Lookup", "Insurance Payment Averages", "Luis and Gerardo Filter", "Territory Map"],
+                            index=["Home", "Doctor Profile Lookup", "Insurance Payment Averages", "Luis and Gerardo Filter", "Territory Map"].index(st.session_state.current_page),
                             key='navigation')
     navigate_to(page)
 
     # Home Page
     if st.session_state.current_page == "Home":
+        timer.section("Top doctors")
         st.title("CMS Doctor Prioritization Interface")
 
         # Glossary Section
@@ -72,86 +139,93 @@ if check_password():
             st.write("**CAGR**: The compound growth (or decline) rate for referrals by this doctor to CMS in the last three months when this database was collected (June-August, 2024).")
             st.write("**Referrals**: The maximum number of referrals given by a doctor in a single month in the last two years.")
             st.write("**Luis, Gerardo or Alex**: If this doctor was found in a database owned by Luis, Gerardo or Alex, and, if so, in which one.")
+
+        # Download files are generated only when a button is clicked, then memoized (see exports.py)
+        export_format = st.radio("Download format:", list(FORMATS), horizontal=True)
         
         # Display a list of top-priority doctors sorted by general prioritization index
         st.write("## Top Priority Doctors")
-        top_doctors = doctor_matching_df[['Referring Physician', 'Prioritization Index', 'Specialty', 'Insurance', 'Referrals', 'Luis, Gerardo o Alex', 'CAGR']]
-        top_doctors = top_doctors.sort_values(by='Prioritization Index', ascending=False).drop_duplicates(subset='Referring Physician').reset_index(drop=True)
-        top_doctors['Rank'] = top_doctors.index + 1
-        top_doctors['Insurance'] = top_doctors.groupby('Referring Physician')['Insurance'].transform(lambda x: ', '.join(x.unique()))
-        top_doctors['Luis, Gerardo o Alex'] = top_doctors['Luis, Gerardo o Alex'].apply(lambda x: f"YES, {x}" if x else "NO")
-
-        top_doctors['CAGR'] = pd.to_numeric(top_doctors['CAGR'], errors='coerce').apply(lambda x: f"{x * 100:.1f}%" if pd.notna(x) else "N/A")
-        top_doctors = top_doctors[['Rank', 'Referring Physician', 'Specialty', 'Insurance', 'CAGR', 'Referrals', 'Luis, Gerardo o Alex']]
+        top_doctors = leaderboards.top_doctors
+        last_contacts = load_contact_store().last_contacts()
 
-        st.write(top_doctors)
-        towrite = BytesIO()
-        top_doctors.to_excel(towrite, index=False, sheet_name='Top Doctors')
-        towrite.seek(0)
-        st.download_button("Download Top Doctors Data", data=towrite, file_name="top_doctors.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        st.dataframe(with_contact_status(top_doctors, last_contacts), column_config=column_config(top_doctors))
+        st.download_button("Download Top Doctors Data",
+                           data=lambda: export_table('top_doctors', None, model.version, export_format,
+                                                     lambda: leaderboards.top_doctors, sheet_name='Top Doctors'),
+                           file_name=file_name("top_doctors", export_format), mime=mime_type(export_format), on_click="ignore")
 
+        timer.section("Procedure ranking")
         # Procedure Prioritization Ranking for All Doctors
         st.write("## Doctor Priorization per Procedure")
-        available_procedures = procedure_prioritization_df['Procedure'].unique()
+        available_procedures = list(leaderboards.by_procedure)
         selected_procedure = st.selectbox("Select a procedure to view the ranking of doctors:", available_procedures)
 
         if selected_procedure:
-            filtered_procedures = procedure_prioritization_df[
-                (procedure_prioritization_df['Procedure'] == selected_procedure) &
-                (procedure_prioritization_df['Prioritization Index Procedure'].notna())
-            ].sort_values(by='Prioritization Index Procedure', ascending=False).drop_duplicates(subset='Referring Physician').reset_index(drop=True)
-            filtered_procedures['Rank'] = filtered_procedures.index + 1
-            filtered_procedures = filtered_procedures.merge(doctor_matching_df[['Referring Physician', 'Luis, Gerardo o Alex']].drop_duplicates(subset='Referring Physician'), on='Referring Physician', how='left')
-            filtered_procedures['Luis, Gerardo o Alex'] = filtered_procedures['Luis, Gerardo o Alex'].apply(lambda x: f"YES, {x}" if x else "NO")
-            filtered_procedures['CAGR'] = pd.to_numeric(filtered_procedures['CAGR'], errors='coerce').apply(lambda x: f"{x*100:.1f}%" if pd.notna(x) else "N/A")
-            filtered_procedures = filtered_procedures[['Rank', 'Referring Physician', 'Procedure', 'CAGR', 'Referrals', 'Luis, Gerardo o Alex']]
-
-            st.write(filtered_procedures)
-            towrite = BytesIO()
-            filtered_procedures.to_excel(towrite, index=False, sheet_name='Procedure Ranking')
-            towrite.seek(0)
-            st.download_button("Download Procedure Ranking Data", data=towrite, file_name="procedure_ranking.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            filtered_procedures = leaderboards.by_procedure[selected_procedure]
 
+            st.dataframe(with_contact_status(filtered_procedures, last_contacts), column_config=column_config(filtered_procedures))
+            st.download_button("Download Procedure Ranking Data",
+                               data=lambda procedure=selected_procedure: export_table(
+                                   'procedure_ranking', procedure, model.version, export_format,
+                                   lambda: leaderboards.by_procedure[procedure], sheet_name='Procedure Ranking'),
+                               file_name=file_name("procedure_ranking", export_format), mime=mime_type(export_format), on_click="ignore")
+
+        timer.section("Specialty ranking")
         # Specialty-wise ranking table
         st.write("## Doctors Priorization per Specialty")
-        available_specialties = doctor_matching_df['Specialty'].unique()
+        available_specialties = list(leaderboards.by_specialty)
         selected_specialty = st.selectbox("Select a specialty to view the ranking of doctors:", available_specialties)
 
         if selected_specialty:
-            filtered_specialty = doctor_matching_df[
-                doctor_matching_df['Specialty'] == selected_specialty
-            ].sort_values(by='Prioritization Index', ascending=False).drop_duplicates(subset='Referring Physician').reset_index(drop=True)
-            filtered_specialty['Rank'] = filtered_specialty.index + 1
-            filtered_specialty['Insurance'] = filtered_specialty.groupby('Referring Physician')['Insurance'].transform(lambda x: ', '.join(x.unique()))
-            filtered_specialty['Luis, Gerardo o Alex'] = filtered_specialty['Luis, Gerardo o Alex'].apply(lambda x: f"YES, {x}" if x else "NO")
-            filtered_specialty = filtered_specialty[['Rank', 'Referring Physician', 'Specialty', 'Insurance', 'Referrals', 'Luis, Gerardo o Alex']]
-
-            st.write(filtered_specialty)
-            towrite = BytesIO()
-            filtered_specialty.to_excel(towrite, index=False, sheet_name='Specialty Ranking')
-            towrite.seek(0)
-            st.download_button("Download Specialty Ranking Data", data=towrite, file_name="specialty_ranking.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            filtered_specialty = leaderboards.by_specialty[selected_specialty]
+
+            st.dataframe(with_contact_status(filtered_specialty, last_contacts), column_config=column_config(filtered_specialty))
+            st.download_button("Download Specialty Ranking Data",
+                               data=lambda specialty=selected_specialty: export_table(
+                                   'specialty_ranking', specialty, model.version, export_format,
+                                   lambda: leaderboards.by_specialty[specialty], sheet_name='Specialty Ranking'),
+                               file_name=file_name("specialty_ranking", export_format), mime=mime_type(export_format), on_click="ignore")
+
+        timer.section("Exports")
+        # Every procedure / specialty ranking in one file for the sales team
+        st.write("## Export All Rankings")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Download All Procedure Rankings",
+                               data=lambda: export_all('procedure_ranking', model.version, export_format,
+                                                       leaderboards.by_procedure, 'Procedure Ranking'),
+                               file_name=file_name("all_procedure_rankings", export_format), mime=mime_type(export_format), on_click="ignore")
+        with col2:
+            st.download_button("Download All Specialty Rankings",
+                               data=lambda: export_all('specialty_ranking', model.version, export_format,
+                                                       leaderboards.by_specialty, 'Specialty Ranking'),
+                               file_name=file_name("all_specialty_rankings", export_format), mime=mime_type(export_format), on_click="ignore")
 
                 # Add a button to download the ranking explanation
         with open('Explicacion_Indice_Priorizacion_Doctor_Procedimientos.docx', 'rb') as file:
             st.download_button("Download Ranking Explanation", data=file, file_name="Explicacion_Indice_Priorizacion_Doctor_Procedimientos.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
     # Doctor Profile Lookup Page
     elif st.session_state.current_page == "Doctor Profile Lookup":
+        timer.section("Name search")
         st.title("Doctor Profile Lookup")
     
-        doctor_name = st.selectbox("Search for a doctor by name:", options=doctor_matching_df['Referring Physician'].unique(), index=0)
+        # Names are matched on the server; only the top matches are sent to the browser
+        search_query = st.text_input("Search for a doctor by name:", placeholder="e.g. Sanchez Masiques, or Jorge Sanchez")
+        matches = load_name_index(model.version, model).search(search_query)
+        if search_query and not matches:
+            st.warning("No doctors match that name.")
+        doctor_name = st.selectbox("Matching doctors:", options=matches, index=0)
     
+        timer.section("Profile")
         if doctor_name:
             doctor_data = doctor_matching_df[doctor_matching_df['Referring Physician'] == doctor_name]
     
             if not doctor_data.empty:
                 first_entry = doctor_data.iloc[0]
                 st.write(f"## Doctor Profile: {first_entry['Referring Physician']}")
-                rank_data = doctor_matching_df[['Referring Physician', 'Prioritization Index']].sort_values(by='Prioritization Index', ascending=False).reset_index(drop=True)
-                rank = rank_data[rank_data['Referring Physician'] == first_entry['Referring Physician']].index
-                if len(rank) > 0:
-                    rank = rank[0] + 1
-                    total_doctors = len(rank_data)
+                doctor_rank = rank_index.doctor_rank(first_entry['Referring Physician'])
+                if doctor_rank:
+                    rank, total_doctors = doctor_rank
                     st.write(f"- **Rank:** {rank}/{total_doctors}")
                 else:
                     st.write("- **Rank:** Not Available")
@@ -159,33 +233,18 @@ if check_password():
                 col1, col2 = st.columns(2)
     
                 with col1:
-                    st.write(f"- **Specialty:** {first_entry['Specialty']}")
-                    insurances = ', '.join(doctor_data['Insurance'].unique())
+                    st.write(f"- **Specialty:** {first_entry['Specialty'] if pd.notna(first_entry['Specialty']) else ''}")
+                    insurances = join_unique(doctor_data['Insurance'])
                     st.write(f"- **Insurances:** {insurances}")
                     luis_gerardo_alex = first_entry['Luis, Gerardo o Alex']
                     st.write(f"- **Luis, Gerardo o Alex:** {'YES, ' + luis_gerardo_alex if luis_gerardo_alex else 'NO'}")
                 
                 with col2:
-                    # Fix for including all relevant procedures
-                    procedures = procedure_prioritization_df[
-                        (procedure_prioritization_df['Referring Physician'] == doctor_name) &
-                        (procedure_prioritization_df['Prioritization Index Procedure'].notna())
-                    ].reset_index(drop=True)
-                    
-                    procedure_info = []
-                    for _, row in procedures.iterrows():
-                        procedure_name = row['Procedure']
-                        procedure_rank_data = procedure_prioritization_df[
-                            (procedure_prioritization_df['Procedure'] == procedure_name) &
-                            (procedure_prioritization_df['Prioritization Index Procedure'].notna())
-                        ].sort_values(by='Prioritization Index Procedure', ascending=False).reset_index(drop=True)
-                        procedure_rank = procedure_rank_data[procedure_rank_data['Referring Physician'] == doctor_name].index
-                        
-                        if len(procedure_rank) > 0:
-                            procedure_rank = procedure_rank[0] + 1
-                            total_procedures = len(procedure_rank_data)
-                            if procedure_rank <= total_procedures:
-                                procedure_info.append(f"{procedure_name} (Rank: {procedure_rank}/{total_procedures})")
+                    # All scored procedures of the doctor, ranked from the precomputed index
+                    procedure_info = [
+                        f"{procedure_name} (Rank: {procedure_rank}/{total_procedures})"
+                        for procedure_name, procedure_rank, total_procedures in rank_index.procedure_ranks_for(doctor_name)
+                    ]
                     
                     if procedure_info:
                         st.write(f"- **Procedures Done:** {', '.join(procedure_info)}")
@@ -194,6 +253,8 @@ if check_password():
                     
                     max_referrals = doctor_data['Referrals'].max()
                     st.write(f"- **Max Referrals in a Month:** {max_referrals}")
+                    last_contact = load_contact_store().last_contact(doctor_name)
+                    st.write(f"- **Last Contacted:** {last_contact or 'Never'}")
 
                 with st.expander("Addresses and Contact Information"):
                     addresses = doctor_data[['Insurance', 'Address', 'Phone Number', 'Latitude', 'Longitude']].drop_duplicates()
@@ -203,76 +264,47 @@ if check_password():
                         st.write(f"  - **Gotten from:** {row['Insurance']}")
                         st.write("---")
 
+                timer.section("Map")
                 st.write("### Map of Locations:")
-                avg_lat = doctor_data['Latitude'].mean() if 'Latitude' in doctor_data.columns else 0
-                avg_lon = doctor_data['Longitude'].mean() if 'Longitude' in doctor_data.columns else 0
-                doctor_map = folium.Map(location=[avg_lat, avg_lon], zoom_start=12)
-
-                for _, row in doctor_data.iterrows():
-                    if row['Latitude'] and row['Longitude']:
-                        folium.Marker(
-                            location=[row['Latitude'], row['Longitude']],
-                            popup=f"{row['Referring Physician']} - {row['Specialty']}",
-                            icon=folium.Icon(color='blue', icon='info-sign')
-                        ).add_to(doctor_map)
-
-                # Add a standard location marker for "CMS Diagnostic Services"
-                folium.Marker(
-                    location=[25.701410, -80.342660],
-                    popup="CMS Diagnostic Services",
-                    icon=folium.Icon(color='red', icon='hospital')
-                ).add_to(doctor_map)
-
-                folium_static(doctor_map)
+                # Rendered once per doctor and data version, then served from the map cache
+                map_html = doctor_map_html(doctor_name, model.version,
+                                           lambda: doctor_matching_df[doctor_matching_df['Referring Physician'] == doctor_name])
+                st.iframe(map_html, height=MAP_HEIGHT + 10, width=MAP_WIDTH)
     # Luis and Gerardo Filter Page
     elif st.session_state.current_page == "Luis and Gerardo Filter":
+        timer.section("Rep roll-up")
         st.title("Luis and Gerardo Filter")
 
         # Filter based on Luis or Gerardo
         filter_option = st.radio("Select Filter:", ("Luis", "Gerardo"))
 
-        if filter_option == "Luis":
-            filtered_df = doctor_matching_df[doctor_matching_df['Luis'] == 'x']
-        elif filter_option == "Gerardo":
-            filtered_df = doctor_matching_df[doctor_matching_df['Gerardo'] == 'x']
-
-        # Create a unique doctors dataframe with specified columns
-        unique_doctors = (filtered_df
-            .groupby('Referring Physician')
-            .agg({
-                'Specialty': 'first',
-                'Insurance': lambda x: ', '.join(x.unique()),
-                'Referrals': 'max',
-                'CAGR': 'first',
-                'Luis': 'first',
-                'Gerardo': 'first',
-                'Prioritization Index': 'first'
-            })
-            .reset_index()
-            .sort_values(by='Prioritization Index', ascending=False)
-        )
-
-        # Format CAGR as percentage and drop Prioritization Index from display
-        unique_doctors['CAGR'] = pd.to_numeric(unique_doctors['CAGR'], errors='coerce').apply(lambda x: f"{x*100:.1f}%" if pd.notna(x) else "N/A")
-        unique_doctors = unique_doctors.drop(columns=['Prioritization Index'])
+        # One row per doctor, with Prioritization Index dropped from display;
+        # CAGR is shown as a percentage by the column config
+        unique_doctors = load_rep_rollups(model.version, model)[filter_option]
+        rep_doctors = unique_doctors['Referring Physician']
 
         # Display filtered data
-        st.dataframe(unique_doctors)
+        st.dataframe(with_contact_status(unique_doctors, load_contact_store().last_contacts()), column_config=column_config(unique_doctors))
 
+        timer.section("Name search")
         # Search bar to look up doctor by name
-        doctor_name = st.selectbox("Search for a doctor by name:", options=filtered_df['Referring Physician'].unique(), index=0)
+        search_query = st.text_input("Search for a doctor by name:", placeholder="e.g. Sanchez Masiques, or Jorge Sanchez")
+        matches = load_name_index(model.version, model).search(search_query, within=rep_doctors)
+        if search_query and not matches:
+            st.warning("No doctors match that name.")
+        doctor_name = st.selectbox("Matching doctors:", options=matches, index=0)
         
+        timer.section("Profile")
         if doctor_name:
-            doctor_data = filtered_df[filtered_df['Referring Physician'] == doctor_name]
+            doctor_data = doctor_matching_df[(doctor_matching_df['Referring Physician'] == doctor_name)
+                                             & (doctor_matching_df[REP_COLUMNS[filter_option]] == 'x')]
 
             if not doctor_data.empty:
                 first_entry = doctor_data.iloc[0]
                 st.write(f"## Doctor Profile: {first_entry['Referring Physician']}")
-                rank_data = doctor_matching_df[['Referring Physician', 'Prioritization Index']].sort_values(by='Prioritization Index', ascending=False).reset_index(drop=True)
-                rank = rank_data[rank_data['Referring Physician'] == first_entry['Referring Physician']].index
-                if len(rank) > 0:
-                    rank = rank[0] + 1
-                    total_doctors = len(rank_data)
+                doctor_rank = rank_index.doctor_rank(first_entry['Referring Physician'])
+                if doctor_rank:
+                    rank, total_doctors = doctor_rank
                     st.write(f"- **Rank:** {rank}/{total_doctors}")
                 else:
                     st.write("- **Rank:** Not Available")
@@ -280,8 +312,8 @@ if check_password():
                 col1, col2 = st.columns(2)
 
                 with col1:
-                    st.write(f"- **Specialty:** {first_entry['Specialty']}")
-                    insurances = ', '.join(doctor_data['Insurance'].unique())
+                    st.write(f"- **Specialty:** {first_entry['Specialty'] if pd.notna(first_entry['Specialty']) else ''}")
+                    insurances = join_unique(doctor_data['Insurance'])
                     st.write(f"- **Insurances:** {insurances}")
                     luis_gerardo = first_entry['Luis'] if pd.notna(first_entry['Luis']) else ''
                     gerardo = first_entry['Gerardo'] if pd.notna(first_entry['Gerardo']) else ''
@@ -290,6 +322,8 @@ if check_password():
                 with col2:
                     max_referrals = doctor_data['Referrals'].max()
                     st.write(f"- **Max Referrals in a Month:** {max_referrals}")
+                    last_contact = load_contact_store().last_contact(doctor_name)
+                    st.write(f"- **Last Contacted:** {last_contact or 'Never'}")
 
                 with st.expander("Addresses and Contact Information"):
                     addresses = doctor_data[['Insurance', 'Address', 'Phone Number', 'Latitude', 'Longitude']].drop_duplicates()
@@ -299,69 +333,126 @@ if check_password():
                         st.write(f"  - **Gotten from:** {row['Insurance']}")
                         st.write("---")
 
+                timer.section("Map")
                 st.write("### Map of Locations:")
-                avg_lat = doctor_data['Latitude'].mean() if 'Latitude' in doctor_data.columns else 0
-                avg_lon = doctor_data['Longitude'].mean() if 'Longitude' in doctor_data.columns else 0
-                doctor_map = folium.Map(location=[avg_lat, avg_lon], zoom_start=12)
-
-                for _, row in doctor_data.iterrows():
-                    if row['Latitude'] and row['Longitude']:
-                        folium.Marker(
-                            location=[row['Latitude'], row['Longitude']],
-                            popup=f"{row['Referring Physician']} - {row['Specialty']}",
-                            icon=folium.Icon(color='blue', icon='info-sign')
-                        ).add_to(doctor_map)
-
-                # Add a standard location marker for "CMS Diagnostic Services"
-                folium.Marker(
-                    location=[25.701410, -80.342660],
-                    popup="CMS Diagnostic Services",
-                    icon=folium.Icon(color='red', icon='hospital')
-                ).add_to(doctor_map)
-
-                folium_static(doctor_map)
+                # Rendered once per doctor and data version, then served from the map cache
+                map_html = doctor_map_html(doctor_name, model.version,
+                                           lambda: doctor_matching_df[doctor_matching_df['Referring Physician'] == doctor_name])
+                st.iframe(map_html, height=MAP_HEIGHT + 10, width=MAP_WIDTH)
 
+        timer.section("Contacts")
         # Mark as Contacted section (moved inside this page)
         st.write("### Mark Doctor as Contacted")
-        contacted_doctor = st.selectbox("Select Doctor:", filtered_df['Referring Physician'].unique())
+        contacted_doctor = st.selectbox("Select Doctor:", rep_doctors.tolist())
         if st.button("Mark as Contacted"):
-            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            doctor_matching_df.loc[doctor_matching_df['Referring Physician'] == contacted_doctor, 'Contacted'] = True
-            doctor_matching_df.loc[doctor_matching_df['Referring Physician'] == contacted_doctor, 'Contact_DateTime'] = current_time
+            # One appended event per click; nothing else is rewritten
+            current_time = load_contact_store().record_contact(contacted_doctor, rep=filter_option)
             st.success(f"Doctor {contacted_doctor} marked as contacted at {current_time}")
-            
-            # Save the updated dataframe
-            doctor_matching_df.to_excel('Updated_Doctor_Matching_with_Contact_Status.xlsx', index=False)
             st.info("Contact status and timestamp saved for later review.")
 
-            # Display contact history
-            contact_history = doctor_matching_df[doctor_matching_df['Contacted'] == True][['Referring Physician', 'Contact_DateTime']]
-            if not contact_history.empty:
-                st.write("### Contact History:")
-                st.dataframe(contact_history)
+        # Display contact history for the doctors in this filter
+        contact_history = load_contact_store().history(rep_doctors)
+        if not contact_history.empty:
+            st.write("### Contact History:")
+            st.dataframe(contact_history)
 
 # Insurance Payment Averages Page
     elif st.session_state.current_page == "Insurance Payment Averages":
+        timer.section("Procedure view")
         st.title("Insurance Payment Averages per Procedure")
+        payment_cube = load_payment_cube(model.version, model)
     
-        available_procedures = insurance_payments_df['Procedure'].unique()
+        available_procedures = payment_cube.procedures.tolist()
         selected_procedure = st.selectbox("Select a procedure to view insurance payment averages:", available_procedures)
     
         if selected_procedure:
-            filtered_payments = insurance_payments_df[insurance_payments_df['Procedure'] == selected_procedure]
-    
             # Allow the user to select insurances of interest
-            available_insurances = filtered_payments['Insurance'].unique()
+            available_insurances = payment_cube.insurances_for(selected_procedure)
             selected_insurances = st.multiselect("Select insurances to filter:", options=available_insurances, default=available_insurances)
     
-            # Filter by the selected insurances
-            filtered_payments = filtered_payments[filtered_payments['Insurance'].isin(selected_insurances)]
+            # Numeric lookup into the cube, best margin first; '$' and '%' are applied by the column config at render time
+            filtered_payments = payment_cube.procedure_view(selected_procedure, selected_insurances)
     
-            # Further filtering and formatting
-            filtered_payments = filtered_payments[['Insurance', 'Avg Payment', 'Margin']]
-            filtered_payments = filtered_payments[(filtered_payments['Insurance'] != '') & (filtered_payments['Avg Payment'] != '')]
-            filtered_payments['Avg Payment'] = pd.to_numeric(filtered_payments['Avg Payment'], errors='coerce').apply(lambda x: f"${x:.2f}" if pd.notna(x) else "N/A")
-            filtered_payments['Margin'] = pd.to_numeric(filtered_payments['Margin'], errors='coerce').apply(lambda x: f"{int(x)}%" if pd.notna(x) else "N/A")
-            filtered_payments = filtered_payments.sort_values(by='Margin', ascending=False).reset_index(drop=True)
-    
-            st.write(filtered_payments)
+            st.dataframe(filtered_payments, column_config=column_config(filtered_payments))
+
+        timer.section("Best margin")
+        st.write("## Best-Margin Insurance per Procedure")
+        best_margin = payment_cube.best_margin()
+        st.dataframe(best_margin, column_config=column_config(best_margin))
+
+        timer.section("Compare procedures")
+        st.write("## Compare Procedures")
+        metric = st.radio("Compare:", CUBE_METRICS, index=CUBE_METRICS.index('Margin'), horizontal=True)
+        compared_procedures = st.multiselect("Procedures to compare:", options=available_procedures, default=available_procedures)
+        if compared_procedures:
+            comparison = payment_cube.compare(metric, procedures=compared_procedures)
+            st.dataframe(comparison, column_config=column_config(comparison, like=metric))
+
+        timer.section("Expected revenue")
+        st.write("## Doctors by Expected Revenue")
+        st.write("Each doctor's best-month referrals per procedure, priced at the selected insurance's payment averages.")
+        revenue_index = load_revenue_index(model.version, model, payment_cube)
+        revenue_insurance = st.selectbox("Insurance:", payment_cube.insurances.tolist())
+        listed_only = st.checkbox("Only doctors listed under this insurance", value=True)
+        if revenue_insurance:
+            revenue_ranking = revenue_index.ranking(revenue_insurance, listed_only=listed_only)
+            st.dataframe(revenue_ranking, column_config=column_config(revenue_ranking))
+
+    # Territory Map Page
+    elif st.session_state.current_page == "Territory Map":
+        timer.section("Territory map")
+        st.title("Territory Map")
+        spatial_index = load_spatial_index(model.version, model)
+
+        center_option = st.radio("Center search on:", ("CMS Diagnostic Services", "Clicked point on map"), horizontal=True)
+        radius = st.slider("Radius (miles):", min_value=1, max_value=50, value=5)
+
+        if center_option == "Clicked point on map" and 'territory_center' in st.session_state:
+            center = st.session_state.territory_center
+            center_label = f"({center[0]:.4f}, {center[1]:.4f})"
+        else:
+            center, center_label = CMS_LOCATION, "CMS Diagnostic Services"
+            if center_option == "Clicked point on map":
+                st.info("Click anywhere on the map to search around that point.")
+
+        # The doctor markers are the same on every rerun, so the browser keeps the rendered map;
+        # only the search circle and its center are sent as a layer to redraw
+        search_area = folium.FeatureGroup(name="Search area")
+        folium.Circle(location=list(center), radius=radius * 1609.344, color='red', fill=False).add_to(search_area)
+        map_state = st_folium(territory_base_map(load_territory_markers(model.version, spatial_index)),
+                              center=center, feature_group_to_add=search_area,
+                              height=500, width=700, returned_objects=['last_clicked'], key='territory_map')
+        clicked = (map_state or {}).get('last_clicked')
+        if clicked and (clicked['lat'], clicked['lng']) != st.session_state.get('territory_center'):
+            st.session_state.territory_center = (clicked['lat'], clicked['lng'])
+            if center_option == "Clicked point on map":
+                st.rerun()
+
+        timer.section("Nearby doctors")
+        st.write(f"## Doctors within {radius} miles of {center_label}")
+        nearby = spatial_index.within(center[0], center[1], radius)
+        st.write(f"{len(nearby)} doctors found, ranked by Prioritization Index.")
+        nearby = nearby[['Referring Physician', 'Specialty', 'Address', 'Distance (miles)', 'Prioritization Index']]
+        st.dataframe(nearby, column_config=column_config(nearby))
+
+        st.write("## Nearest Doctors")
+        nearest = spatial_index.nearest(center[0], center[1], k=10)
+        nearest = nearest[['Referring Physician', 'Specialty', 'Address', 'Distance (miles)']]
+        st.dataframe(nearest, column_config=column_config(nearest))
+
+    # Opt-in admin panel: open the app with ?profile=1 (or set CMS_PROFILING=1)
+    if profiling_enabled(st.query_params):
+        render_profiling_panel(
+            timer,
+            lru_caches=[('profile maps', map_cache), ('exports', export_cache)],
+            tables={
+                'Doctor_Matching': doctor_matching_df,
+                'Procedure_Prioritization': procedure_prioritization_df,
+                'Insurance Payment Avgs': insurance_payments_df,
+                'Leaderboards': {'top_doctors': leaderboards.top_doctors, **leaderboards.by_procedure,
+                                 **{f"specialty {key}": df for key, df in leaderboards.by_specialty.items()}},
+            },
+            version=model.version)
+
+    # Fail loudly if a page wrote into the shared data model during this run
+    model.check_unchanged()
@@ -0,0 +1,156 @@
+import html
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import folium
+from folium.plugins import FastMarkerCluster
+from folium.template import Template
+
+from cache import LRUCache
+from geo import CMS_LOCATION
+
+MAP_CACHE_SIZE = 256
+MAP_WIDTH = 700
+MAP_HEIGHT = 500
+
+# Rendered profile map HTML keyed by (physician, data version)
+map_cache = LRUCache(MAP_CACHE_SIZE)
+
+_prebuild_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='map-prebuild')
+
+
+def build_doctor_map_html(doctor_data):
+    """Standalone HTML for a map of one doctor's locations plus CMS Diagnostic Services."""
+    located = doctor_data.dropna(subset=['Latitude', 'Longitude'])
+    avg_lat = located['Latitude'].mean() if not located.empty else CMS_LOCATION[0]
+    avg_lon = located['Longitude'].mean() if not located.empty else CMS_LOCATION[1]
+    doctor_map = folium.Map(location=[avg_lat, avg_lon], zoom_start=12)
+
+    for _, row in located.iterrows():
+        if row['Latitude'] and row['Longitude']:
+            folium.Marker(
+                location=[row['Latitude'], row['Longitude']],
+                popup=f"{row['Referring Physician']} - {row['Specialty']}",
+                icon=folium.Icon(color='blue', icon='info-sign')
+            ).add_to(doctor_map)
+
+    # Add a standard location marker for "CMS Diagnostic Services"
+    folium.Marker(
+        location=list(CMS_LOCATION),
+        popup="CMS Diagnostic Services",
+        icon=folium.Icon(color='red', icon='hospital')
+    ).add_to(doctor_map)
+
+    # Same wrapping streamlit_folium.folium_static uses
+    figure = folium.Figure(height=MAP_HEIGHT).add_child(doctor_map)
+    return figure.render()
+
+
+def doctor_map_html(physician, version, get_doctor_data):
+    """Profile map HTML for a physician, rendered once per data version."""
+    return map_cache.get((physician, version), lambda: build_doctor_map_html(get_doctor_data()))
+
+
+def prebuild_doctor_maps(physicians, version, doctor_matching_df):
+    """Render maps for `physicians` in a background thread pool; returns the futures.
+
+    Meant for the top-prioritized doctors so the most visited profiles never
+    wait on folium. Maps already in the cache are skipped.
+    """
+    rows = doctor_matching_df.groupby('Referring Physician', observed=True).indices
+    futures = []
+    for physician in physicians:
+        if physician not in rows or (physician, version) in map_cache:
+            continue
+        futures.append(_prebuild_pool.submit(
+            doctor_map_html, physician, version,
+            lambda positions=rows[physician]: doctor_matching_df.iloc[positions]))
+    return futures
+
+
+# Marker factory for folium.plugins.FastMarkerCluster: row = [lat, lon, popup]
+MARKER_CALLBACK = """\
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindPopup(row[2]);
+    return marker;
+};
+"""
+
+
+def marker_data(spatial_index):
+    """[[lat, lon, popup html], ...] for every point of a SpatialIndex, for in-browser marker clustering."""
+    points = spatial_index.points
+    labels = (points['Referring Physician'].astype(str) + ' - '
+              + points['Specialty'].astype(str).where(points['Specialty'].notna(), ''))
+    popups = [html.escape(label) for label in labels]
+    return [[lat, lon, popup] for lat, lon, popup in
+            zip(spatial_index.latitudes.tolist(), spatial_index.longitudes.tolist(), popups)]
+
+
+def marker_json(spatial_index):
+    """marker_data() serialized once, for embedding in the Territory Map script."""
+    return json.dumps(marker_data(spatial_index), separators=(',', ':'))
+
+
+class _RawScript(folium.Element):
+    # branca compiles every rendered script as a Jinja template; this one is emitted as is
+    def __init__(self, script):
+        super().__init__()
+        self.script = script
+
+    def render(self, **kwargs):
+        return self.script
+
+
+class PrecomputedMarkerCluster(FastMarkerCluster):
+    """FastMarkerCluster over an already serialized [[lat, lon, popup], ...] array.
+
+    FastMarkerCluster validates and re-serializes every row, and branca then
+    compiles the rendered script as a template, on every render; this embeds a
+    JSON string built once per data version and emits the script uncompiled.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                {{ this.callback }}
+
+                var data = {{ this.data_json }};
+                var cluster = L.markerClusterGroup({{ this.options|tojavascript }});
+                for (var i = 0; i < data.length; i++) {
+                    callback(data[i]).addTo(cluster);
+                }
+
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}""")
+
+    def __init__(self, data_json, callback=MARKER_CALLBACK, **kwargs):
+        super().__init__([], callback=callback, **kwargs)
+        self.data_json = data_json
+
+    def render(self, **kwargs):
+        data_json, self.data_json = self.data_json, '[]'
+        try:
+            super().render(**kwargs)
+        finally:
+            self.data_json = data_json
+        self.get_root().script.add_child(_RawScript(self._template.module.script(self, kwargs)), name=self.get_name())
+
+
+def territory_base_map(data_json):
+    """The static part of the Territory Map: every doctor, clustered in the browser, plus CMS.
+
+    It is the same on every rerun, so streamlit_folium keeps the rendered map
+    and only swaps the dynamic layers (search circle, center) passed as
+    feature_group_to_add.
+    """
+    territory_map = folium.Map(location=list(CMS_LOCATION), zoom_start=11)
+    PrecomputedMarkerCluster(data_json, name="Doctors").add_to(territory_map)
+    folium.Marker(
+        location=list(CMS_LOCATION),
+        popup="CMS Diagnostic Services",
+        icon=folium.Icon(color='red', icon='hospital')
+    ).add_to(territory_map)
+    return territory_map
@@ -0,0 +1,195 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from rankings import doctor_order, procedure_order
+
+CUBE_METRICS = ['Avg Payment', 'Margin']
+REVENUE_COLUMNS = ['Rank', 'Referring Physician', 'Specialty', 'Expected Revenue', 'Expected Profit', 'Procedures Priced']
+
+
+def _keys(values):
+    # The sheets spell the same procedure / insurance differently ('Cardio Pet' vs 'CARDIO PET', 'Medicare' vs 'MEDICARE')
+    return pd.Index(pd.Series(values, dtype=object).astype(str).str.strip().str.upper())
+
+
+@dataclass(frozen=True)
+class PaymentCube:
+    """Insurance Payment Avgs as numeric procedure x insurance matrices.
+
+    Built once per data version; every page view, cross-procedure comparison
+    and best-margin query is a lookup or a reduction over these arrays.
+    Missing (procedure, insurance) pairs are NaN.
+    """
+    procedures: pd.Index
+    insurances: pd.Index
+    # procedures x insurances
+    avg_payment: np.ndarray
+    margin: np.ndarray
+    count: np.ndarray
+    # Upper-cased names, one per row / column, for joining with the doctor sheets
+    procedure_keys: pd.Index
+    insurance_keys: pd.Index
+
+    def _row(self, procedure):
+        return self.procedures.get_loc(procedure)
+
+    def insurances_for(self, procedure):
+        """Insurances with a payment row for `procedure`, most claims first (the sheet's order)."""
+        row = self._row(procedure)
+        present = np.flatnonzero(~np.isnan(self.avg_payment[row]) | ~np.isnan(self.margin[row]))
+        present = present[np.argsort(-self.count[row, present], kind='stable')]
+        return self.insurances[present].tolist()
+
+    def procedure_view(self, procedure, insurances=None):
+        """Insurance, Avg Payment and Margin for one procedure, best margin first."""
+        row = self._row(procedure)
+        view = pd.DataFrame({
+            'Insurance': self.insurances,
+            'Avg Payment': self.avg_payment[row],
+            'Margin': self.margin[row],
+        })
+        view = view[view['Avg Payment'].notna()]
+        if insurances is not None:
+            view = view[view['Insurance'].isin(insurances)]
+        return view.sort_values(by='Margin', ascending=False, na_position='last', kind='mergesort').reset_index(drop=True)
+
+    def compare(self, metric='Margin', procedures=None, insurances=None):
+        """procedure x insurance table of `metric`, for comparing procedures side by side."""
+        table = pd.DataFrame(self.avg_payment if metric == 'Avg Payment' else self.margin,
+                             index=self.procedures.rename('Procedure'), columns=self.insurances)
+        if procedures is not None:
+            table = table.loc[list(procedures)]
+        if insurances is not None:
+            table = table[list(insurances)]
+        # Most widely priced insurances first; drop insurances with nothing to compare
+        priced = table.notna().sum()
+        return table[priced[priced > 0].sort_values(ascending=False, kind='mergesort').index]
+
+    def best_margin(self):
+        """The highest-margin insurance of every procedure."""
+        margin = np.where(np.isnan(self.margin), -np.inf, self.margin)
+        best = margin.argmax(axis=1)
+        rows = np.arange(len(self.procedures))
+        found = np.isfinite(margin[rows, best])
+        return pd.DataFrame({
+            'Procedure': self.procedures[found],
+            'Insurance': self.insurances[best[found]],
+            'Avg Payment': self.avg_payment[rows, best][found],
+            'Margin': self.margin[rows, best][found],
+        })
+
+
+def _merged(cells, size, values, weights):
+    """Per-cell Count-weighted mean of `values`, ignoring blanks; unweighted where no row has a Count."""
+    present = ~np.isnan(values)
+    values = np.where(present, values, 0.0)
+    weights = np.where(present, weights, 0.0)
+    total = np.bincount(cells, weights=weights * values, minlength=size)
+    weight = np.bincount(cells, weights=weights, minlength=size)
+    plain = np.bincount(cells, weights=values, minlength=size)
+    rows = np.bincount(cells, weights=present, minlength=size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(weight > 0, total / weight, plain / rows)
+
+
+def build_payment_cube(insurance_payments_df):
+    rows = insurance_payments_df.dropna(subset=['Procedure', 'Insurance'])
+    # Names that differ only in case or spacing are one procedure / insurance, shown as first spelled
+    p, procedure_keys = pd.factorize(_keys(rows['Procedure']))
+    i, insurance_keys = pd.factorize(_keys(rows['Insurance']))
+    procedures = pd.Index(rows['Procedure'].astype(str).to_numpy()[np.unique(p, return_index=True)[1]])
+    insurances = pd.Index(rows['Insurance'].astype(str).to_numpy()[np.unique(i, return_index=True)[1]])
+    shape = (len(procedures), len(insurances))
+    cells = np.ravel_multi_index((p, i), shape) if len(rows) else np.empty(0, dtype=np.intp)
+    count = np.nan_to_num(pd.to_numeric(rows['Count'], errors='coerce').to_numpy(dtype='float64'))
+    single = np.bincount(cells, minlength=shape[0] * shape[1])[cells] == 1
+
+    def matrix(column):
+        values = pd.to_numeric(rows[column], errors='coerce').to_numpy(dtype='float64')
+        # A pair spelled several ways is merged; a pair on one row keeps its value exactly
+        out = _merged(cells, shape[0] * shape[1], values, count)
+        out[cells[single]] = values[single]
+        return out.reshape(shape)
+
+    return PaymentCube(
+        procedures=procedures,
+        insurances=insurances,
+        avg_payment=matrix('Avg Payment'),
+        margin=matrix('Margin'),
+        count=np.bincount(cells, weights=count, minlength=shape[0] * shape[1]).reshape(shape),
+        procedure_keys=pd.Index(procedure_keys),
+        insurance_keys=pd.Index(insurance_keys),
+    )
+
+
+@dataclass(frozen=True)
+class RevenueIndex:
+    """Expected revenue of each physician's procedure mix under each insurance.
+
+    For every physician the procedure mix is their best-month referrals per
+    procedure (Procedure_Prioritization). A ranking for one insurance is a
+    matrix-vector product of the mix with that insurance's column of the cube:
+        Expected Revenue = sum over procedures of referrals x Avg Payment
+        Expected Profit  = sum over procedures of referrals x Avg Payment x Margin
+    Procedures without a payment average for the insurance contribute nothing.
+    Columns are computed per request; doctors and insurances both grow with
+    the data, so a full doctors x insurances matrix would not fit in memory.
+    """
+    doctors: pd.DataFrame
+    cube: PaymentCube
+    # doctors x cube procedures
+    referrals: np.ndarray
+    # insurance position -> positions of the physicians Doctor_Matching lists under it
+    listed: dict
+
+    def ranking(self, insurance, listed_only=True, k=None):
+        """Physicians by expected revenue under `insurance`, highest first."""
+        column = self.cube.insurances.get_loc(insurance)
+        priced = ~np.isnan(self.cube.avg_payment[:, column])
+        payment = np.where(priced, self.cube.avg_payment[:, column], 0.0)
+        margin = np.nan_to_num(self.cube.margin[:, column])
+
+        rows = self.listed.get(column, np.empty(0, dtype=np.intp)) if listed_only else np.arange(len(self.doctors))
+        referrals = self.referrals[rows]
+        procedures_priced = (referrals[:, priced] > 0).sum(axis=1)
+        rows, referrals = rows[procedures_priced > 0], referrals[procedures_priced > 0]
+        procedures_priced = procedures_priced[procedures_priced > 0]
+
+        revenue = referrals @ payment
+        order = np.argsort(-revenue, kind='stable')[:k]
+        ranked = self.doctors.iloc[rows[order]].reset_index(drop=True).assign(**{
+            'Expected Revenue': revenue[order],
+            'Expected Profit': (referrals @ (payment * margin / 100))[order],
+            'Procedures Priced': procedures_priced[order],
+        })
+        ranked['Rank'] = ranked.index + 1
+        return ranked[REVENUE_COLUMNS]
+
+
+def build_revenue_index(cube, doctor_matching_df, procedure_prioritization_df):
+    # Physicians in priority order, so revenue ties keep the Prioritization Index order
+    mix = procedure_order(procedure_prioritization_df).dropna(subset=['Referrals'])
+    ordered = doctor_order(doctor_matching_df)
+    names = pd.Index(pd.concat([ordered['Referring Physician'].astype(str),
+                                mix['Referring Physician'].astype(str)]).unique())
+    specialty = ordered.set_index(ordered['Referring Physician'].astype(str))['Specialty']
+    doctors = pd.DataFrame({'Referring Physician': names, 'Specialty': specialty.reindex(names).to_numpy()})
+
+    referrals = np.zeros((len(names), len(cube.procedures)))
+    d = names.get_indexer(mix['Referring Physician'].astype(str))
+    p = cube.procedure_keys.get_indexer(_keys(mix['Procedure']))
+    matched = p >= 0
+    referrals[d[matched], p[matched]] = mix['Referrals'].to_numpy(dtype='float64')[matched]
+
+    rows = doctor_matching_df.dropna(subset=['Insurance'])
+    listings = pd.DataFrame({
+        'doctor': names.get_indexer(rows['Referring Physician'].astype(str)),
+        'insurance': cube.insurance_keys.get_indexer(_keys(rows['Insurance'])),
+    })
+    listings = listings[(listings['doctor'] >= 0) & (listings['insurance'] >= 0)].drop_duplicates()
+    listed = {insurance: np.sort(group['doctor'].to_numpy())
+              for insurance, group in listings.groupby('insurance')}
+
+    return RevenueIndex(doctors=doctors, cube=cube, referrals=referrals, listed=listed)
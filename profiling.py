@@ -0,0 +1,136 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+
+from cache import LRUCache
+
+# Set to 1 to show the panel in every session; otherwise open the app with ?profile=1
+PROFILING_ENV = 'CMS_PROFILING'
+
+
+def profiling_enabled(query_params):
+    return os.environ.get(PROFILING_ENV) == '1' or query_params.get('profile') == '1'
+
+
+class SectionTimer:
+    """Wall time of consecutive sections of one script run.
+
+    section(name) ends the section in progress and starts `name`, so sections
+    can be marked without re-indenting the page code.
+    """
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self._current = 'Startup'
+        self.sections = []
+
+    def section(self, name):
+        self._close()
+        self._current = name
+
+    def _close(self):
+        now = time.perf_counter()
+        if self._current is not None:
+            self.sections.append((self._current, now - self._last))
+        self._current, self._last = None, now
+
+    def frame(self):
+        self._close()
+        rows = self.sections + [('Total', self._last - self.started)]
+        return pd.DataFrame({'Section': [name for name, _ in rows],
+                             'Milliseconds': [seconds * 1000 for _, seconds in rows]})
+
+
+class CacheStats:
+    """Calls and builds of the app's st.cache_resource loaders, process-wide like the caches."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.builds = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, counter, name):
+        with self._lock:
+            counter[name] += 1
+
+    def cache_resource(self, **kwargs):
+        """Drop-in for st.cache_resource(**kwargs) that counts hits and misses."""
+        import streamlit as st
+
+        def decorator(func):
+            name = func.__name__
+
+            # wraps() keeps the name, signature and source Streamlit keys the cache on
+            @functools.wraps(func)
+            def build(*args, **kw):
+                self._count(self.builds, name)
+                return func(*args, **kw)
+            cached = st.cache_resource(**kwargs)(build)
+
+            @functools.wraps(func)
+            def call(*args, **kw):
+                self._count(self.calls, name)
+                return cached(*args, **kw)
+            call.clear = cached.clear
+            return call
+        return decorator
+
+    def frame(self, lru_caches=()):
+        """Hits and misses of the loaders plus any named LRUCache instances."""
+        rows = [(name, calls - self.builds[name], self.builds[name]) for name, calls in self.calls.items()]
+        rows += [(name, cache.hits, cache.misses) for name, cache in lru_caches]
+        return pd.DataFrame(rows, columns=['Cache', 'Hits', 'Misses'])
+
+
+cache_stats = CacheStats()
+
+# Deep memory_usage walks every string, so measure each table once per data version
+memory_cache = LRUCache(16)
+
+
+def _frames(value):
+    if isinstance(value, pd.DataFrame):
+        return [value]
+    if isinstance(value, dict):
+        return [df for item in value.values() for df in _frames(item)]
+    return []
+
+
+def deep_bytes(df):
+    """df.memory_usage(deep=True).sum(), which pandas refuses on the model's read-only object arrays."""
+    total = df.index.memory_usage(deep=True)
+    for col in df.columns:
+        column = df[col]
+        total += column.memory_usage(index=False, deep=column.dtype != object)
+        if column.dtype == object:
+            total += sum(map(sys.getsizeof, column.to_numpy()))
+    return total
+
+
+def frame_memory(tables, version):
+    """Rows and deep memory footprint of {label: DataFrame or dict of DataFrames}."""
+    def measure(label, value):
+        frames = _frames(value)
+        return label, sum(len(df) for df in frames), sum(deep_bytes(df) for df in frames) / 1e6
+    rows = [memory_cache.get((label, version), lambda label=label, value=value: measure(label, value))
+            for label, value in tables.items()]
+    return pd.DataFrame(rows, columns=['Table', 'Rows', 'MB'])
+
+
+def render_profiling_panel(timer, lru_caches, tables, version):
+    import streamlit as st
+
+    with st.expander("Profiling", expanded=True):
+        st.write("**Section timings (this run)**")
+        st.dataframe(timer.frame(), column_config={'Milliseconds': st.column_config.NumberColumn(format='%.1f')},
+                     hide_index=True)
+        st.write("**Cache hits / misses (this process)**")
+        st.dataframe(cache_stats.frame(lru_caches), hide_index=True)
+        st.write("**DataFrame memory**")
+        st.dataframe(frame_memory(tables, version), column_config={'MB': st.column_config.NumberColumn(format='%.2f')},
+                     hide_index=True)
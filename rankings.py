@@ -0,0 +1,232 @@
+from dataclasses import dataclass
+
+import pandas as pd
+
+from formatting import format_flag
+
+
+def doctor_order(doctor_matching_df):
+    """One row per physician (their best-scored row), highest Prioritization Index first.
+
+    This is the order behind the global 'Rank' shown on the Home page and in
+    doctor profiles; physicians without an index are ranked last. Ties keep
+    their sheet order (stable sort).
+    """
+    return (doctor_matching_df
+            .sort_values(by='Prioritization Index', ascending=False, na_position='last', kind='mergesort')
+            .drop_duplicates(subset='Referring Physician')
+            .reset_index(drop=True))
+
+
+def procedure_order(procedure_prioritization_df):
+    """Scored (procedure, physician) rows, best Prioritization Index Procedure first within each procedure.
+
+    Equal scores are common (thousands of repeats in Procedure_Prioritization);
+    the sort is stable, so tied physicians keep their sheet order and get
+    consecutive ranks in that order.
+    """
+    scored = procedure_prioritization_df[procedure_prioritization_df['Prioritization Index Procedure'].notna()]
+    return (scored
+            .sort_values(by=['Procedure', 'Prioritization Index Procedure'], ascending=[True, False], kind='mergesort')
+            .drop_duplicates(subset=['Procedure', 'Referring Physician'])
+            .reset_index(drop=True))
+
+
+@dataclass(frozen=True)
+class RankIndex:
+    # physician -> (rank, total physicians)
+    doctor_ranks: dict
+    # (procedure, physician) -> (rank, total physicians scored for the procedure)
+    procedure_ranks: dict
+    # physician -> scored procedures, in workbook order
+    doctor_procedures: dict
+
+    def doctor_rank(self, physician):
+        return self.doctor_ranks.get(physician)
+
+    def procedure_ranks_for(self, physician):
+        """[(procedure, rank, total), ...] for every scored procedure of the physician."""
+        return [(procedure, *self.procedure_ranks[(procedure, physician)])
+                for procedure in self.doctor_procedures.get(physician, ())]
+
+
+def build_rank_index(doctor_matching_df, procedure_prioritization_df):
+    doctors = doctor_order(doctor_matching_df)['Referring Physician'].astype(str)
+    doctor_ranks = dict(zip(doctors, zip(range(1, len(doctors) + 1), [len(doctors)] * len(doctors))))
+
+    procedures = procedure_order(procedure_prioritization_df)
+    procedure = procedures['Procedure'].astype(str)
+    physician = procedures['Referring Physician'].astype(str)
+    grouped = procedures.groupby('Procedure', observed=True, sort=False)
+    rank = grouped.cumcount() + 1
+    total = grouped['Referring Physician'].transform('size')
+    procedure_ranks = dict(zip(zip(procedure, physician), zip(rank.tolist(), total.tolist())))
+
+    doctor_procedures = {}
+    scored = procedure_prioritization_df[procedure_prioritization_df['Prioritization Index Procedure'].notna()]
+    for name, proc in zip(scored['Referring Physician'].astype(str), scored['Procedure'].astype(str)):
+        procs = doctor_procedures.setdefault(name, [])
+        if proc not in procs:
+            procs.append(proc)
+
+    return RankIndex(doctor_ranks=doctor_ranks, procedure_ranks=procedure_ranks,
+                     doctor_procedures=doctor_procedures)
+
+
+TOP_DOCTOR_COLUMNS = ['Rank', 'Referring Physician', 'Specialty', 'Insurance', 'CAGR', 'Referrals', 'Luis, Gerardo o Alex']
+PROCEDURE_COLUMNS = ['Rank', 'Referring Physician', 'Procedure', 'CAGR', 'Referrals', 'Luis, Gerardo o Alex']
+SPECIALTY_COLUMNS = ['Rank', 'Referring Physician', 'Specialty', 'Insurance', 'Referrals', 'Luis, Gerardo o Alex']
+
+
+def insurance_lists(df, by):
+    """', '-joined distinct insurances for each group in `by`, across all of the group's rows."""
+    pairs = (df[by + ['Insurance']]
+             .dropna(subset=['Insurance'])
+             .drop_duplicates()
+             .astype({'Insurance': str}))
+    return pairs.groupby(by, observed=True, sort=False)['Insurance'].agg(', '.join).rename('Insurance')
+
+
+def _with_insurance_lists(ranked, df, by):
+    merged = ranked.drop(columns='Insurance').merge(insurance_lists(df, by).reset_index(), on=by, how='left')
+    merged['Insurance'] = merged['Insurance'].fillna('')
+    return merged
+
+
+def _split(board, by, keys, columns):
+    groups = {str(key): group[columns].reset_index(drop=True)
+              for key, group in board.groupby(by, observed=True, sort=False)}
+    empty = board[columns].iloc[0:0].reset_index(drop=True)
+    return {key: groups.get(key, empty) for key in keys}
+
+
+@dataclass(frozen=True)
+class Leaderboards:
+    # Home page tables, materialized once per data version. Numeric columns
+    # stay numeric; see formatting.py for how they are displayed.
+    top_doctors: pd.DataFrame
+    # procedure -> ranking table, in the order procedures appear in the workbook
+    by_procedure: dict
+    # specialty -> ranking table, in the order specialties appear in the workbook
+    by_specialty: dict
+
+
+def top_doctor_leaderboard(doctor_matching_df):
+    """Global leaderboard, insurances collected over all of a physician's rows."""
+    top_doctors = _with_insurance_lists(doctor_order(doctor_matching_df), doctor_matching_df, ['Referring Physician'])
+    top_doctors['Rank'] = top_doctors.index + 1
+    top_doctors['Luis, Gerardo o Alex'] = format_flag(top_doctors['Luis, Gerardo o Alex'])
+    return top_doctors[TOP_DOCTOR_COLUMNS]
+
+
+def procedure_flags(doctor_matching_df):
+    return (doctor_matching_df[['Referring Physician', 'Luis, Gerardo o Alex']]
+            .drop_duplicates(subset='Referring Physician'))
+
+
+def procedure_leaderboards(procedure_prioritization_df, flags, keys=None):
+    """procedure -> ranking table for every procedure in the frame (or in `keys`, in that order).
+
+    Rankings only depend on the procedure's own rows, so any subset of
+    procedures can be built independently.
+    """
+    procedures = procedure_order(procedure_prioritization_df)
+    procedures['Rank'] = procedures.groupby('Procedure', observed=True, sort=False).cumcount() + 1
+    procedures = procedures.merge(flags, on='Referring Physician', how='left')
+    procedures['Luis, Gerardo o Alex'] = format_flag(procedures['Luis, Gerardo o Alex'])
+    if keys is None:
+        keys = procedure_prioritization_df['Procedure'].dropna().astype(str).unique().tolist()
+    return _split(procedures, 'Procedure', keys, PROCEDURE_COLUMNS)
+
+
+def specialty_leaderboards(doctor_matching_df, keys=None):
+    """specialty -> ranking table: best row per (specialty, physician), insurances
+    collected over the physician's rows within that specialty."""
+    specialties = (doctor_matching_df[doctor_matching_df['Specialty'].notna()]
+                   .sort_values(by=['Specialty', 'Prioritization Index'], ascending=[True, False], kind='mergesort')
+                   .drop_duplicates(subset=['Specialty', 'Referring Physician'])
+                   .reset_index(drop=True))
+    specialties = _with_insurance_lists(specialties, doctor_matching_df, ['Specialty', 'Referring Physician'])
+    specialties['Rank'] = specialties.groupby('Specialty', observed=True, sort=False).cumcount() + 1
+    specialties['Luis, Gerardo o Alex'] = format_flag(specialties['Luis, Gerardo o Alex'])
+    if keys is None:
+        keys = doctor_matching_df['Specialty'].dropna().astype(str).unique().tolist()
+    return _split(specialties, 'Specialty', keys, SPECIALTY_COLUMNS)
+
+
+def build_leaderboards(doctor_matching_df, procedure_prioritization_df):
+    return Leaderboards(
+        top_doctors=top_doctor_leaderboard(doctor_matching_df),
+        by_procedure=procedure_leaderboards(procedure_prioritization_df, procedure_flags(doctor_matching_df)),
+        by_specialty=specialty_leaderboards(doctor_matching_df),
+    )
+
+
+def join_unique(values):
+    """The distinct, non-blank values of a column, ', '-joined for display."""
+    return ', '.join(pd.Series(values).dropna().astype(str).unique())
+
+
+# Sales rep -> Doctor_Matching column marking their doctors with 'x'
+REP_COLUMNS = {'Luis': 'Luis', 'Gerardo': 'Gerardo'}
+
+
+REP_ROLLUP_COLUMNS = ['Referring Physician', 'Specialty', 'Insurance', 'Referrals', 'CAGR', 'Luis', 'Gerardo']
+
+
+def rep_rollup(doctor_matching_df, rep):
+    """One row per physician flagged for `rep`, highest Prioritization Index first."""
+    flagged = doctor_matching_df[doctor_matching_df[REP_COLUMNS[rep]] == 'x']
+    rollup = (flagged
+              .groupby('Referring Physician', observed=True)
+              .agg({
+                  'Specialty': 'first',
+                  'Referrals': 'max',
+                  'CAGR': 'first',
+                  'Luis': 'first',
+                  'Gerardo': 'first',
+                  'Prioritization Index': 'first'
+              })
+              .reset_index()
+              .sort_values(by='Prioritization Index', ascending=False, kind='mergesort'))
+    rollup = rollup.merge(insurance_lists(flagged, ['Referring Physician']).reset_index(),
+                          on='Referring Physician', how='left')
+    rollup['Insurance'] = rollup['Insurance'].fillna('')
+    return rollup[REP_ROLLUP_COLUMNS]
+
+
+def rep_rollups(doctor_matching_df):
+    """{rep: rep_rollup} for every rep in REP_COLUMNS."""
+    return {rep: rep_rollup(doctor_matching_df, rep) for rep in REP_COLUMNS}
+
+
+PROFILE_COLUMNS = ['Rank', 'Referring Physician', 'Specialty', 'Insurances', 'Luis, Gerardo o Alex',
+                   'Procedures Done', 'Max Referrals in a Month']
+LOCATION_COLUMNS = ['Referring Physician', 'Insurance', 'Address', 'Phone Number', 'Latitude', 'Longitude']
+
+
+def doctor_profiles(doctor_matching_df, rank_index):
+    """The Doctor Profile Lookup page for every physician, one row each, in rank order."""
+    first = doctor_matching_df.drop_duplicates(subset='Referring Physician').set_index('Referring Physician')
+    order = doctor_order(doctor_matching_df)['Referring Physician']
+    physicians = order.astype(str).tolist()
+    profiles = pd.DataFrame({
+        'Rank': [rank_index.doctor_rank(name)[0] for name in physicians],
+        'Referring Physician': physicians,
+        'Specialty': first['Specialty'].reindex(order).to_numpy(),
+        'Insurances': insurance_lists(doctor_matching_df, ['Referring Physician']).reindex(order).fillna('').to_numpy(),
+        'Luis, Gerardo o Alex': format_flag(first['Luis, Gerardo o Alex'].reindex(order)),
+        'Procedures Done': [', '.join(f"{procedure} (Rank: {rank}/{total})"
+                                      for procedure, rank, total in rank_index.procedure_ranks_for(name))
+                            for name in physicians],
+        'Max Referrals in a Month': (doctor_matching_df.groupby('Referring Physician', observed=True)['Referrals']
+                                     .max().reindex(order).to_numpy()),
+    })
+    return profiles[PROFILE_COLUMNS]
+
+
+def doctor_locations(doctor_matching_df):
+    """Addresses and contact information behind each profile."""
+    return (doctor_matching_df[LOCATION_COLUMNS]
+            .drop_duplicates()
+            .reset_index(drop=True))
@@ -0,0 +1,123 @@
+"""Headless report generator: every leaderboard, rep roll-up and doctor profile in one file.
+
+Uses the same ranking code as the app (rankings.py), so nightly reports match
+what the Home, Doctor Profile Lookup and Luis and Gerardo Filter pages show.
+Rankings of different procedures and specialties don't depend on each
+other, so they are built in parallel across a process pool.
+
+Run from the repository root:
+
+    python reports.py [--out reports.xlsx | reports.parquet] [--workers N]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from contact_store import CONTACT_DB, ContactStore, with_contact_status
+from data_model import build_model
+from data_store import SOURCE_FILE, load_frames
+from exports import bundle_bytes
+from rankings import (build_rank_index, doctor_locations, doctor_profiles, procedure_flags,
+                      procedure_leaderboards, rep_rollups, specialty_leaderboards, top_doctor_leaderboard)
+
+REPORT_LABEL = 'Report'
+
+
+def _chunks(keys, n):
+    # Round-robin, so large and small groups spread evenly over the workers
+    return [chunk for chunk in (keys[i::n] for i in range(n)) if chunk]
+
+
+def _procedure_jobs(model, flags, workers):
+    pp = model.procedure_prioritization
+    keys = pp['Procedure'].dropna().astype(str).unique().tolist()
+    # Each job only gets the rows of its own procedures
+    return keys, [(procedure_leaderboards, pp[pp['Procedure'].isin(chunk)], flags, chunk)
+                  for chunk in _chunks(keys, workers)]
+
+
+def _specialty_jobs(model, workers):
+    dm = model.doctor_matching
+    keys = dm['Specialty'].dropna().astype(str).unique().tolist()
+    return keys, [(specialty_leaderboards, dm[dm['Specialty'].isin(chunk)], chunk)
+                  for chunk in _chunks(keys, workers)]
+
+
+def generate_reports(model, workers=None, last_contacts=None):
+    """{report name: DataFrame} for every table in the nightly bundle, in bundle order.
+
+    `workers` processes build the procedure and specialty rankings; 1 builds
+    everything in this process. `last_contacts` (see ContactStore) adds a
+    'Last Contacted' column to the per-rep reports.
+    """
+    workers = workers or os.cpu_count() or 1
+    dm = model.doctor_matching
+    procedure_keys, procedure_jobs = _procedure_jobs(model, procedure_flags(dm), workers)
+    specialty_keys, specialty_jobs = _specialty_jobs(model, workers)
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        if pool:
+            procedure_parts = [pool.submit(*job) for job in procedure_jobs]
+            specialty_parts = [pool.submit(*job) for job in specialty_jobs]
+
+        # Global tables are built here while the workers rank procedures and specialties
+        rank_index = build_rank_index(dm, model.procedure_prioritization)
+        reports = {
+            'Top Doctors': top_doctor_leaderboard(dm),
+            'Doctor Profiles': doctor_profiles(dm, rank_index),
+            'Doctor Locations': doctor_locations(dm),
+        }
+        for rep, rollup in rep_rollups(dm).items():
+            reports[f"Rep - {rep}"] = rollup if last_contacts is None else with_contact_status(rollup, last_contacts)
+
+        if pool:
+            procedure_parts = [part.result() for part in procedure_parts]
+            specialty_parts = [part.result() for part in specialty_parts]
+        else:
+            procedure_parts = [job[0](*job[1:]) for job in procedure_jobs]
+            specialty_parts = [job[0](*job[1:]) for job in specialty_jobs]
+    finally:
+        if pool:
+            pool.shutdown()
+
+    by_procedure = {key: table for part in procedure_parts for key, table in part.items()}
+    by_specialty = {key: table for part in specialty_parts for key, table in part.items()}
+    reports.update((f"Procedure - {key}", by_procedure[key]) for key in procedure_keys)
+    reports.update((f"Specialty - {key}", by_specialty[key]) for key in specialty_keys)
+    return reports
+
+
+def write_reports(reports, path):
+    """Write the bundle: one sheet per report for .xlsx, one long table with a 'Report' column for .parquet."""
+    fmt = 'parquet' if path.endswith('.parquet') else 'xlsx'
+    data = bundle_bytes(reports, fmt, REPORT_LABEL)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate every leaderboard, rep report and doctor profile.")
+    parser.add_argument('--source', default=SOURCE_FILE, help="prioritization workbook")
+    parser.add_argument('--out', default='reports.xlsx', help="output .xlsx or .parquet path")
+    parser.add_argument('--workers', type=int, default=None, help="processes for the rankings (default: one per core)")
+    parser.add_argument('--contacts', default=CONTACT_DB, help="contact log for 'Last Contacted' (skipped if missing)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    model = build_model(*load_frames(args.source))
+    last_contacts = ContactStore(args.contacts).last_contacts() if os.path.exists(args.contacts) else None
+    loaded = time.perf_counter()
+    reports = generate_reports(model, workers=args.workers, last_contacts=last_contacts)
+    generated = time.perf_counter()
+    size = write_reports(reports, args.out)
+    written = time.perf_counter()
+
+    print(f"{len(reports)} reports: load {loaded - start:.2f}s, generate {generated - loaded:.2f}s, "
+          f"write {written - generated:.2f}s -> {args.out} ({size / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,405 @@
+"""Prioritization Index scoring from raw referral rows (base_data.xlsx).
+
+Implements the method in Explicacion_Indice_Priorizacion_Doctor_Procedimientos.docx,
+once per physician (general index) and once per (physician, procedure):
+
+- Referral potential: the most referrals in any single month, divided by the
+  largest value in the group.
+- Dropoff: CAGR of monthly referrals across the last CAGR_MONTHS months,
+  weight = clip(0.25 - 5 * CAGR, 0, 1): a physician who stopped referring
+  (CAGR = -1) gets the full weight, flat referrals 0.25 and growth of 5% or
+  more none. Without referrals in the first month there is no CAGR and no
+  weight. This reproduces the workbook's Dropoff Weight from its CAGR column.
+- Profitability: sum over referrals of the insurance's Avg Payment x Margin
+  for that procedure, winsorized at the 95th percentile and divided by that cap.
+  The normalized value is the workbook's 'Priority Boost' column.
+- Index = 0.4 referral potential + 0.3 dropoff + 0.3 profitability, plus
+  HIGH_REFERRAL_BOOST for physicians above HIGH_REFERRAL_THRESHOLD referrals
+  a month, divided by 1 + HIGH_REFERRAL_BOOST so it stays within [0, 1].
+
+Per-procedure scores are normalized within each procedure. The CAGR window
+ends in CAGR_AS_OF (June to August 2024, as in the docx) unless as_of says
+otherwise.
+
+Run from the repository root:
+
+    python scoring.py [base_data.xlsx] [--as-of 2024-08 | latest] [--out scores.xlsx]
+"""
+import argparse
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+BASE_DATA_FILE = 'base_data.xlsx'
+PAYMENTS_FILE = 'Updated_Doctor_Matching_with_Luis_Gerardo_Status.xlsx'
+PAYMENTS_SHEET = 'Insurance Payment Avgs'
+
+WEIGHTS = {'referrals': 0.4, 'dropoff': 0.3, 'profitability': 0.3}
+WINSOR_PERCENTILE = 95
+HIGH_REFERRAL_THRESHOLD = 10
+HIGH_REFERRAL_BOOST = 0.1
+CAGR_MONTHS = 3
+CAGR_AS_OF = '2024-08'
+DROPOFF_BASE = 0.25
+DROPOFF_SLOPE = 5.0
+
+# base_data.xlsx procedure names -> procedure codes used by the workbook
+PROCEDURE_CODES = {
+    'ULTRA SOUND': 'US',
+    'MAMMOGRAM': 'MAMMO',
+    'CARDIAC PET': 'CARDIO PET',
+    'ONCO PET': 'PT',
+    'SLEEP STUDY': 'SL',
+    'OPEN MRI': 'MRO',
+}
+
+REFERRAL_COLUMNS = ['Referring Physician', 'Insurance', 'Procedure', 'Date']
+DOCTOR_KEYS = ['Referring Physician']
+PROCEDURE_KEYS = ['Referring Physician', 'Procedure']
+
+
+def _categorical(values, clean):
+    """Apply `clean` (a function of a string Index) once per distinct value; returns a Categorical.
+
+    Referral files repeat a handful of names across millions of rows, so this
+    is much cheaper than running the .str methods on every row.
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    cleaned, categories = pd.factorize(clean(pd.Index(uniques, dtype=object).astype(str)), sort=True)
+    return pd.Categorical.from_codes(np.where(codes >= 0, cleaned.take(codes, mode='clip'), -1),
+                                     categories=categories)
+
+
+def procedure_code(names):
+    return _categorical(names, lambda names: names.str.strip().str.upper().map(
+        lambda name: PROCEDURE_CODES.get(name, name)))
+
+
+def load_referrals(path=BASE_DATA_FILE):
+    raw = pd.read_excel(path)
+    return normalize_referrals(raw.rename(columns={
+        'REFERRING PHYSICIAN': 'Referring Physician',
+        'Data Set': 'Insurance',
+        'PROCEDURE': 'Procedure',
+        'TRANSFORMED DATE': 'Date',
+    }))
+
+
+def normalize_referrals(referrals):
+    referrals = referrals[REFERRAL_COLUMNS].dropna(subset=['Referring Physician', 'Procedure', 'Date'])
+    return pd.DataFrame({
+        'Referring Physician': _categorical(referrals['Referring Physician'], lambda names: names.str.strip()),
+        'Insurance': _categorical(referrals['Insurance'].fillna(''), lambda names: names.str.strip().str.upper()),
+        'Procedure': procedure_code(referrals['Procedure']),
+        'Date': pd.to_datetime(referrals['Date']),
+    })
+
+
+def load_payments(path=PAYMENTS_FILE, sheet_name=PAYMENTS_SHEET):
+    return pd.read_excel(path, sheet_name=sheet_name)
+
+
+def profit_per_referral(payments):
+    """(procedure code, insurance) -> Avg Payment x Margin for one referral."""
+    payments = payments.dropna(subset=['Insurance', 'Procedure'])
+    value = (pd.to_numeric(payments['Avg Payment'], errors='coerce')
+             * pd.to_numeric(payments['Margin'], errors='coerce') / 100).fillna(0)
+    index = pd.MultiIndex.from_arrays([
+        np.asarray(procedure_code(payments['Procedure'])),
+        payments['Insurance'].astype(str).str.strip().str.upper().to_numpy(),
+    ], names=['Procedure', 'Insurance'])
+    return pd.Series(value.to_numpy(), index=index).groupby(level=[0, 1]).mean()
+
+
+def _group_codes(referrals, keys):
+    """Row -> group number for the distinct `keys` combinations, and the sorted group index."""
+    factorized = [pd.factorize(referrals[key], sort=True) for key in keys]
+    shape = [len(uniques) for _, uniques in factorized]
+    combined = np.ravel_multi_index([codes for codes, _ in factorized], shape) if referrals.size else np.empty(0, dtype='int64')
+    groups, codes = np.unique(combined, return_inverse=True)
+    levels = [np.asarray(uniques, dtype=object).take(position)
+              for (_, uniques), position in zip(factorized, np.unravel_index(groups, shape))]
+    if len(keys) == 1:
+        return codes, pd.Index(levels[0], name=keys[0])
+    return codes, pd.MultiIndex.from_arrays(levels, names=keys)
+
+
+def _aggregate(referrals, keys, profits):
+    """Monthly referral counts (entities x months) and total profit per entity."""
+    codes, index = _group_codes(referrals, keys)
+
+    months = referrals['Date'].dt.to_period('M')
+    ordinals = months.array.asi8
+    first = ordinals.min()
+    n_months = ordinals.max() - first + 1
+    counts = np.bincount(codes * n_months + (ordinals - first),
+                         minlength=len(index) * n_months).reshape(len(index), n_months)
+    columns = pd.period_range(months.min(), periods=n_months, freq='M')
+
+    # Look up each distinct (procedure, insurance) pair once
+    pairs, lookup = _group_codes(referrals, ['Procedure', 'Insurance'])
+    values = profits.reindex(lookup).fillna(0).to_numpy().take(pairs)
+    profit = np.bincount(codes, weights=values, minlength=len(index))
+
+    return pd.DataFrame(counts, index=index, columns=columns), pd.Series(profit, index=index)
+
+
+def _features(counts, as_of):
+    """Raw (unnormalized) inputs of the index for each row of a counts frame."""
+    history = counts.loc[:, counts.columns <= as_of]
+    window = counts.reindex(columns=pd.period_range(end=as_of, periods=CAGR_MONTHS, freq='M'), fill_value=0)
+    first = window.iloc[:, 0].to_numpy(dtype='float64')
+    last = window.iloc[:, -1].to_numpy(dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = np.where(first > 0, (last / first) ** (1 / (CAGR_MONTHS - 1)) - 1, np.nan)
+    dropoff = np.where(np.isnan(cagr), 0.0, np.clip(DROPOFF_BASE - DROPOFF_SLOPE * cagr, 0, 1))
+    return pd.DataFrame({
+        'Referrals': history.max(axis=1).to_numpy() if history.shape[1] else 0,
+        'CAGR': cagr,
+        'Dropoff Weight': dropoff,
+    }, index=counts.index)
+
+
+def _positive_profit(features, profit):
+    return profit.reindex(features.index).fillna(0).clip(lower=0)
+
+
+def _normalization(features, profit, group=None):
+    """(max referrals, profitability cap): scalars, or Series per `group` level value."""
+    positive = _positive_profit(features, profit)
+    if group:
+        return (features['Referrals'].groupby(level=group).max(),
+                positive.groupby(level=group).quantile(WINSOR_PERCENTILE / 100))
+    if not len(features):
+        return 0, 0.0
+    return features['Referrals'].max(), float(np.percentile(positive, WINSOR_PERCENTILE))
+
+
+def _constants(index, normalization, group=None):
+    """(max referrals, profitability cap) of each entity in `index`; NaN for groups not in `normalization`."""
+    max_referrals, cap = normalization
+    if not group:
+        return np.full(len(index), max_referrals, dtype='float64'), np.full(len(index), cap, dtype='float64')
+    labels = index.get_level_values(group)
+    return labels.map(max_referrals).to_numpy(dtype='float64'), labels.map(cap).to_numpy(dtype='float64')
+
+
+def _score(features, profit, normalization, group=None):
+    """Normalize and weight the features of some entities, given the constants of the whole set."""
+    max_referrals, cap = _constants(features.index, normalization, group)
+    referrals = features['Referrals'].to_numpy(dtype='float64')
+    positive = _positive_profit(features, profit).to_numpy()
+    capped = np.minimum(positive, cap)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized_referrals = np.where(max_referrals > 0, referrals / max_referrals, 0.0)
+        normalized_profit = np.where(cap > 0, capped / cap, 0.0)
+    boost = np.where(referrals > HIGH_REFERRAL_THRESHOLD, HIGH_REFERRAL_BOOST, 0.0)
+
+    index = (WEIGHTS['referrals'] * normalized_referrals
+             + WEIGHTS['dropoff'] * features['Dropoff Weight'].to_numpy()
+             + WEIGHTS['profitability'] * normalized_profit
+             + boost) / (1 + HIGH_REFERRAL_BOOST)
+    return features.assign(**{
+        'Capped Profitability': capped,
+        'Priority Boost': normalized_profit,
+        'High Referral Boost': boost,
+        'Index': index,
+    })
+
+
+def _last_complete_month(dates):
+    latest = dates.max()
+    month = latest.to_period('M')
+    return month if latest.normalize() == month.end_time.normalize() else month - 1
+
+
+@dataclass
+class _Level:
+    keys: list
+    group: str = None
+    counts: pd.DataFrame = None
+    profit: pd.Series = None
+    features: pd.DataFrame = None
+    scores: pd.DataFrame = None
+    _normalization: tuple = field(default=None, repr=False)
+
+    def fit(self, referrals, profits, as_of):
+        self.counts, self.profit = _aggregate(referrals, self.keys, profits)
+        self.features = _features(self.counts, as_of)
+        self._rescore()
+
+    def update(self, referrals, profits, as_of, window_moved):
+        counts, profit = _aggregate(referrals, self.keys, profits)
+        self.counts = self.counts.add(counts, fill_value=0).fillna(0).astype('int64')
+        self.profit = self.profit.add(profit, fill_value=0)
+        touched = counts.index
+        if window_moved:
+            # Every entity's CAGR window shifted, not just the ones with new rows
+            self.features = _features(self.counts, as_of)
+            touched = self.counts.index
+        else:
+            fresh = _features(self.counts.loc[touched], as_of)
+            self.features = pd.concat([self.features[~self.features.index.isin(touched)], fresh]).sort_index()
+        return self._rescore(touched)
+
+    def _rescore(self, touched=None):
+        normalization = _normalization(self.features, self.profit, self.group)
+        if touched is None or self.scores is None:
+            self.scores = _score(self.features, self.profit, normalization, self.group)
+            self._normalization = normalization
+            return self.scores.index
+        touched = touched.union(self._moved(normalization))
+        fresh = _score(self.features.loc[touched], self.profit, normalization, self.group)
+        self.scores = pd.concat([self.scores[~self.scores.index.isin(touched)], fresh]).sort_index()
+        # Profit above the cap is shown as the cap, so that column follows the cap even where the index doesn't
+        _, cap = _constants(self.scores.index, normalization, self.group)
+        self.scores['Capped Profitability'] = np.minimum(_positive_profit(self.scores, self.profit).to_numpy(), cap)
+        self._normalization = normalization
+        return touched
+
+    def _moved(self, normalization):
+        """Entities whose index changes because their group's max referrals or profitability cap moved."""
+        old_max, old_cap = _constants(self.features.index, self._normalization, self.group)
+        new_max, new_cap = _constants(self.features.index, normalization, self.group)
+        referrals = self.features['Referrals'].to_numpy(dtype='float64')
+        positive = _positive_profit(self.features, self.profit).to_numpy()
+        # Zero referrals normalize to 0 under any max; profit at or above both caps to 1
+        moved = (((old_max != new_max) & (referrals > 0))
+                 | ((old_cap != new_cap) & (positive > 0) & (positive < np.fmax(old_cap, new_cap))))
+        return self.features.index[moved]
+
+
+class ScoringEngine:
+    """Prioritization Index for every physician and (physician, procedure).
+
+    fit() aggregates all referral rows with np.bincount into per-entity
+    monthly counts and profit totals. update() aggregates only the new rows
+    and adds them in. Physicians and procedures without new rows are only
+    recomputed if the CAGR window moved to a new month (every index shifts)
+    or if the max referrals or profitability cap of their group moved in a
+    way that changes their own index. The general index has one group, so
+    any change to its 95th percentile profit rescores most physicians.
+
+    as_of is the last month of the CAGR window; None follows the last
+    complete month of the data, moving forward as updates arrive.
+    """
+
+    def __init__(self, payments, as_of=CAGR_AS_OF):
+        self.profits = profit_per_referral(payments)
+        self.as_of = pd.Period(as_of, freq='M') if as_of is not None else None
+        self._fixed_as_of = as_of is not None
+        self.doctors = _Level(DOCTOR_KEYS)
+        self.procedures = _Level(PROCEDURE_KEYS, group='Procedure')
+
+    def fit(self, referrals):
+        referrals = normalize_referrals(referrals)
+        if not self._fixed_as_of:
+            self.as_of = _last_complete_month(referrals['Date'])
+        self.doctors.fit(referrals, self.profits, self.as_of)
+        self.procedures.fit(referrals, self.profits, self.as_of)
+        return self
+
+    def update(self, new_referrals):
+        """Add new referral rows; returns {'doctors': keys, 'procedures': keys} that were rescored."""
+        new_referrals = normalize_referrals(new_referrals)
+        if new_referrals.empty:
+            return {'doctors': self.doctors.scores.index[:0], 'procedures': self.procedures.scores.index[:0]}
+        previous = self.as_of
+        if not self._fixed_as_of:
+            self.as_of = max(previous, _last_complete_month(new_referrals['Date']))
+        window_moved = self.as_of != previous
+        return {
+            'doctors': self.doctors.update(new_referrals, self.profits, self.as_of, window_moved),
+            'procedures': self.procedures.update(new_referrals, self.profits, self.as_of, window_moved),
+        }
+
+    def doctor_scores(self):
+        """Same columns as the Doctor_Matching index inputs, best first."""
+        return (self.doctors.scores
+                .rename(columns={'Index': 'Prioritization Index'})
+                .reset_index()
+                .sort_values(by='Prioritization Index', ascending=False, kind='mergesort')
+                .reset_index(drop=True))
+
+    def procedure_scores(self):
+        """Same columns as Procedure_Prioritization, best first within each procedure."""
+        return (self.procedures.scores
+                .drop(columns=['Priority Boost', 'High Referral Boost'])
+                .rename(columns={'Index': 'Prioritization Index Procedure'})
+                .reset_index()
+                .sort_values(by=['Procedure', 'Prioritization Index Procedure'], ascending=[True, False], kind='mergesort')
+                .reset_index(drop=True))
+
+
+RECONCILE_COLUMNS = ['Referrals', 'CAGR', 'Dropoff Weight', 'Capped Profitability', 'Priority Boost',
+                     'Prioritization Index']
+
+
+def reconcile(doctor_scores, doctor_matching_df):
+    """How doctor_scores() agrees with the workbook's Doctor_Matching columns, for physicians in both.
+
+    One row per column: physicians compared, Pearson and Spearman correlation
+    and mean absolute difference.
+    """
+    workbook = doctor_matching_df.assign(**{
+        'Referring Physician': doctor_matching_df['Referring Physician'].astype(str).str.strip(),
+    }).drop_duplicates(subset='Referring Physician').set_index('Referring Physician')
+    scores = doctor_scores.set_index(doctor_scores['Referring Physician'].astype(str))
+    both = scores.index.intersection(workbook.index)
+    rows = []
+    for col in RECONCILE_COLUMNS:
+        ours = scores.loc[both, col].astype('float64')
+        theirs = pd.to_numeric(workbook.loc[both, col], errors='coerce')
+        paired = ours.notna() & theirs.notna()
+        rows.append({
+            'Column': col,
+            'Physicians': len(both),
+            'Pearson': ours.corr(theirs),
+            # Spearman without scipy: Pearson of the ranks
+            'Spearman': ours[paired].rank().corr(theirs[paired].rank()),
+            'Mean Abs Diff': (ours - theirs).abs().mean(),
+        })
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    from data_store import SHEETS
+    from exports import write_xlsx
+
+    parser = argparse.ArgumentParser(description="Score physicians and procedures from raw referral data.")
+    parser.add_argument('base_data', nargs='?', default=BASE_DATA_FILE)
+    parser.add_argument('--payments', default=PAYMENTS_FILE, help="workbook with the 'Insurance Payment Avgs' sheet")
+    parser.add_argument('--as-of', default=CAGR_AS_OF,
+                        help=f"last month of the CAGR window (default: {CAGR_AS_OF}, as in the docx; "
+                             f"'latest' for the last complete month of the data)")
+    parser.add_argument('--out', default='scores.xlsx', help="output .xlsx or .parquet path")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    referrals = load_referrals(args.base_data)
+    engine = ScoringEngine(load_payments(args.payments), as_of=None if args.as_of == 'latest' else args.as_of)
+    loaded = time.perf_counter()
+    engine.fit(referrals)
+    scored = time.perf_counter()
+
+    doctors, procedures = engine.doctor_scores(), engine.procedure_scores()
+    if args.out.endswith('.parquet'):
+        pd.concat([doctors.assign(Level='Doctor'), procedures.assign(Level='Procedure')],
+                  ignore_index=True).to_parquet(args.out, index=False)
+    else:
+        with open(args.out, 'wb') as f:
+            f.write(write_xlsx([('Doctor_Scores', doctors), ('Procedure_Scores', procedures)]))
+    print(f"{len(referrals):,} referrals as of {engine.as_of}: read {loaded - start:.1f}s, "
+          f"scored {scored - loaded:.2f}s -> {len(doctors):,} doctors, {len(procedures):,} doctor/procedure pairs "
+          f"written to {args.out}")
+
+    # The workbook's own index inputs, from the extract behind the shipped workbook
+    agreement = reconcile(doctors, pd.read_excel(args.payments, sheet_name=SHEETS['doctor_matching']))
+    print(f"\nAgreement with {SHEETS['doctor_matching']} in {args.payments}:")
+    print(agreement.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+
+import numpy as np
+
+from rankings import doctor_order
+
+
+def normalize_name(text):
+    """Uppercase ASCII letters and single spaces: 'Sánchez-Masiques, Jorge' -> 'SANCHEZ MASIQUES JORGE'."""
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.sub(r'[^A-Z ]+', ' ', text.upper()).split())
+
+
+def trigrams(text, partial=False):
+    """Padded 3-grams of each word, so word order ('LAST, FIRST' vs 'FIRST LAST') doesn't matter.
+
+    With `partial`, the last word may still be being typed, so it is only
+    padded in front: 'SAN' gives ' SA' and 'SAN', which SANCHEZ contains.
+    """
+    grams = set()
+    tokens = normalize_name(text).split()
+    for position, token in enumerate(tokens):
+        padded = f" {token}" if partial and position == len(tokens) - 1 else f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass(frozen=True)
+class NameIndex:
+    """Server-side fuzzy physician search over a trigram inverted index.
+
+    Candidates are scored by containment, the share of the query's trigrams
+    found in the name, which tolerates accents, typos and either name order
+    and gives a name starting with the typed text a full score. Close scores
+    are then ordered by Prioritization Index. Queries too short for trigrams
+    ('Sa', 'J') are answered from the sorted words of every name instead.
+    """
+    names: np.ndarray
+    # normalize_name() of each name
+    keys: np.ndarray
+    name_sizes: np.ndarray
+    postings: dict
+    ids: dict
+    # Every word of every normalized name, sorted, and the name it belongs to
+    tokens: np.ndarray
+    token_names: np.ndarray
+
+    def __len__(self):
+        return len(self.names)
+
+    def top(self, k=20, within=None):
+        """The k highest-priority physicians, used before anything is typed."""
+        order = np.arange(len(self.names)) if within is None else np.flatnonzero(self.mask(within))
+        return self.names[order[:k]].tolist()
+
+    def mask(self, physicians):
+        selected = np.zeros(len(self.names), dtype=bool)
+        positions = [self.ids[name] for name in map(str, physicians) if name in self.ids]
+        selected[positions] = True
+        return selected
+
+    def search(self, query, k=20, within=None, min_similarity=0.3):
+        """Up to k physician names matching `query`, best match first.
+
+        `within` optionally restricts results to an iterable of physician
+        names, e.g. the doctors of the current page filter.
+        """
+        words = normalize_name(query).split()
+        if not words:
+            return self.top(k, within)
+        if max(map(len, words)) < 3:
+            return self.prefix_search(query, k, within)
+
+        grams = trigrams(query, partial=True)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return self.prefix_search(query, k, within)
+        overlap = np.bincount(np.concatenate(hits), minlength=len(self.names))
+        similarity = overlap / len(grams)
+        if within is not None:
+            similarity = np.where(self.mask(within), similarity, 0)
+
+        candidates = np.flatnonzero(similarity >= min_similarity)
+        # Names are stored in priority order, so a stable sort on the rounded
+        # score, then on whether the name starts with the query, keeps equally
+        # good matches ranked by Prioritization Index
+        rounded = np.round(similarity[candidates], 1)
+        candidates = candidates[np.lexsort((~self._starts_with(candidates, query), -rounded))]
+        return self.names[candidates[:k]].tolist()
+
+    def _starts_with(self, positions, query):
+        return np.char.startswith(self.keys[positions], normalize_name(query))
+
+    def prefix_search(self, query, k=20, within=None):
+        """Up to k names with a word starting with each word of `query`, by Prioritization Index."""
+        matched = None
+        for prefix in normalize_name(query).split():
+            # '~' sorts after every letter, so [prefix, prefix~) is the words starting with prefix
+            start, stop = np.searchsorted(self.tokens, [prefix, prefix + '~'])
+            positions = np.unique(self.token_names[start:stop])
+            matched = positions if matched is None else np.intersect1d(matched, positions, assume_unique=True)
+        if matched is None:
+            return self.top(k, within)
+        if within is not None:
+            matched = matched[self.mask(within)[matched]]
+        matched = matched[np.argsort(~self._starts_with(matched, query), kind='stable')]
+        return self.names[matched[:k]].tolist()
+
+
+def build_name_index(doctor_matching_df):
+    doctors = doctor_order(doctor_matching_df)
+    names = doctors['Referring Physician'].astype(str).to_numpy(dtype=object)
+
+    postings = {}
+    name_sizes = np.empty(len(names), dtype=np.int32)
+    words, word_names = [], []
+    for position, name in enumerate(names):
+        grams = trigrams(name)
+        name_sizes[position] = len(grams)
+        for gram in grams:
+            postings.setdefault(gram, []).append(position)
+        for word in normalize_name(name).split():
+            words.append(word)
+            word_names.append(position)
+    words = np.array(words, dtype=str)
+    order = np.argsort(words, kind='stable')
+
+    return NameIndex(
+        names=names,
+        keys=np.array([normalize_name(name) for name in names], dtype=str),
+        name_sizes=name_sizes,
+        postings={gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()},
+        ids={name: position for position, name in enumerate(names)},
+        tokens=words[order],
+        token_names=np.array(word_names, dtype=np.int32)[order],
+    )